@@ -34,15 +34,16 @@ def profile(request):
         image_form = ProfileImageForm(instance=user)
     user_reviews = []
     total_points = 0
+    earned = 0
+    redeemed = 0
     try:
-        from appdely.models import Review, Point
+        from appdely.models import Review, PointBalance
         user_reviews = Review.objects.filter(user=user).select_related('business').order_by('-date')[:10]
-        # Total points: sum all movements (earn are positive, redeem are negative)
-        total_points = Point.objects.filter(user=user).aggregate(total=models.Sum('amount'))['total'] or 0
-        # For display, also compute earned and redeemed separately (redeemed stored as negative amounts)
-        earned = Point.objects.filter(user=user, movement_type='earn').aggregate(total=models.Sum('amount'))['total'] or 0
-        redeemed_sum = Point.objects.filter(user=user, movement_type='redeem').aggregate(total=models.Sum('amount'))['total'] or 0
-        redeemed = abs(redeemed_sum) if redeemed_sum else 0
+        # Materialized balance: total, earned and redeemed (redeemed kept as a positive number)
+        balance = PointBalance.for_user(user)
+        total_points = balance.total
+        earned = balance.earned
+        redeemed = balance.redeemed
     except Exception:
         pass
     return render(request, 'accounts/profile.html', {
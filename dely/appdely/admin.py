@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib import admin
 
-from .models import  BusinessType, Business, BusinessImage, Favorite, Review, Point
+from .models import  BusinessType, Business, BusinessImage, Favorite, Review, Point, PointBalance, CompletionCache, ImportJob
 
 @admin.register(Business)
 class BusinessAdmin(admin.ModelAdmin):
@@ -11,4 +11,7 @@ admin.site.register(BusinessType)
 admin.site.register(Favorite)
 admin.site.register(Review)
 admin.site.register(Point)
+admin.site.register(PointBalance)
+admin.site.register(CompletionCache)
+admin.site.register(ImportJob)
 admin.site.register(BusinessImage)
@@ -0,0 +1,144 @@
+"""Caché de páginas completas con invalidación por grupos.
+
+Cada vista cacheada declara de qué grupos de datos depende ('business',
+'promocion', 'noticia'). Cada grupo tiene un número de versión guardado en la
+propia caché y la clave de una página incluye las versiones de sus grupos, de
+modo que invalidar un grupo es solo incrementar su versión: las entradas viejas
+dejan de encontrarse y caducan solas. Las señales post_save/post_delete de los
+modelos registrados con invalidate_on() hacen el incremento al confirmar la
+transacción; las cargas masivas (que no disparan señales) llaman a invalidate().
+Un grupo también puede ser una función de la petición que devuelve el nombre
+del grupo o None (p. ej. un grupo por usuario, ver favorites.page_group).
+
+La clave varía por vista, parámetros GET y estado de autenticación (usuario y
+cookie CSRF, porque la página lleva el token). No se cachea si hay mensajes
+pendientes ni si la respuesta no es un 200. Funciona con cualquier backend de
+caché de Django (memoria local, archivos, memcached, redis).
+
+Configuración (settings.DELY_VIEW_CACHE):
+    ALIAS    caché de settings.CACHES a usar (por defecto 'default')
+    TIMEOUT  segundos que vive una página (por defecto 300)
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import patch_vary_headers
+
+DEFAULTS = {
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+KEY_PREFIX = 'dely:view'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'DELY_VIEW_CACHE', {})}
+
+
+def get_cache():
+    return caches[get_config()['ALIAS']]
+
+
+def _group_key(group):
+    return f'{KEY_PREFIX}:group:{group}'
+
+
+def group_versions(groups):
+    """Versión actual de cada grupo; un grupo sin versión (nuevo o desalojado) arranca en el instante actual."""
+    cache = get_cache()
+    keys = [_group_key(group) for group in groups]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Un valor basado en la hora evita reutilizar versiones de entradas anteriores al desalojo
+            cache.add(key, time.time_ns() // 1000, None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*groups):
+    """Invalida todas las páginas que dependen de alguno de los grupos."""
+    cache = get_cache()
+    for group in groups:
+        key = _group_key(group)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns() // 1000, None)
+
+
+def invalidate_on(model, *groups):
+    """Invalida los grupos cada vez que se guarda o borra una instancia de model."""
+    def handler(sender, **kwargs):
+        transaction.on_commit(lambda: invalidate(*groups))
+
+    uid = f'view-cache-{model._meta.label_lower}'
+    post_save.connect(handler, sender=model, weak=False, dispatch_uid=f'{uid}-save')
+    post_delete.connect(handler, sender=model, weak=False, dispatch_uid=f'{uid}-delete')
+
+
+def _auth_state(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return 'anon'
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    return f'u{user.pk}:{hashlib.md5(csrf_cookie.encode()).hexdigest()}'
+
+
+def _page_key(request, view_name, groups):
+    params = hashlib.md5(
+        '&'.join(f'{k}={v}' for k, values in sorted(request.GET.lists()) for v in values).encode()
+    ).hexdigest()
+    versions = '.'.join(str(v) for v in group_versions(groups))
+    return f'{KEY_PREFIX}:{view_name}:{versions}:{_auth_state(request)}:{params}'
+
+
+def _cacheable(request, response):
+    if response.status_code != 200 or response.has_header('Set-Cookie') or response.cookies:
+        return False
+    # La página lleva un token CSRF distinto del de la cookie del navegador (cookie
+    # nueva o rotada): guardarla daría a la siguiente petición un token inválido
+    if request.META.get('CSRF_COOKIE_NEEDS_UPDATE') and \
+            request.META.get('CSRF_COOKIE') != request.COOKIES.get(settings.CSRF_COOKIE_NAME):
+        return False
+    return True
+
+
+def cache_view(*groups):
+    """Decorador para vistas GET cuya página depende solo de los grupos indicados.
+
+    Los grupos pueden ser nombres o funciones request -> nombre (o None).
+    """
+    def decorator(view):
+        view_name = f'{view.__module__}.{view.__name__}'
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+                return view(request, *args, **kwargs)
+
+            cache = get_cache()
+            names = [group(request) if callable(group) else group for group in groups]
+            names = [name for name in names if name is not None]
+            key = _page_key(request, f'{view_name}:{args}:{sorted(kwargs.items())}', names)
+            response = cache.get(key)
+            if response is not None:
+                return response
+
+            response = view(request, *args, **kwargs)
+            patch_vary_headers(response, ('Cookie',))
+            if _cacheable(request, response) and not len(get_messages(request)):
+                if hasattr(response, 'render') and callable(response.render):
+                    response.add_post_render_callback(lambda r: cache.set(key, r, get_config()['TIMEOUT']))
+                else:
+                    cache.set(key, response, get_config()['TIMEOUT'])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,130 @@
+"""Contadores de vistas con escritura diferida.
+
+Las vistas de detalle no escriben en la BD en cada visita: los incrementos se
+acumulan en memoria (por proceso) y un hilo en segundo plano los vuelca por lotes
+con UPDATE ... SET campo = campo + n, un UPDATE por grupo de filas con el mismo
+incremento. Como se usan expresiones F() no se pierden incrementos concurrentes.
+
+Configuración (settings.DELY_COUNTERS):
+    FLUSH_INTERVAL  segundos entre volcados (por defecto 30)
+    MAX_PENDING     filas pendientes que despiertan al hilo de volcado antes de tiempo
+                    (por defecto 1000); la petición nunca vuelca por sí misma
+    DURABILITY      'buffered' (en memoria; una caída pierde como mucho un intervalo)
+                    o 'immediate' (UPDATE atómico en cada incremento, sin buffer)
+"""
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'FLUSH_INTERVAL': 30,
+    'MAX_PENDING': 1000,
+    'DURABILITY': 'buffered',
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'DELY_COUNTERS', {})}
+
+
+def _apply(model, pks, field, amount):
+    queryset = model._default_manager.filter(pk__in=pks)
+    # Los querysets con increment() actualizan en el mismo UPDATE los campos que
+    # dependen del contador (p. ej. Business.discovery_score)
+    if hasattr(queryset, 'increment'):
+        return queryset.increment(field, amount)
+    return queryset.update(**{field: F(field) + amount})
+
+
+class CounterBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()  # (modelo, campo, pk) -> incremento acumulado
+        self._flusher = None
+        self._wake = threading.Event()
+
+    def increment(self, model, pk, field, amount=1):
+        config = get_config()
+        if config['DURABILITY'] == 'immediate':
+            _apply(model, [pk], field, amount)
+            return
+
+        with self._lock:
+            self._pending[(model._meta.label, field, pk)] += amount
+            if self._flusher is None:
+                self._start_flusher(config['FLUSH_INTERVAL'])
+            if len(self._pending) >= config['MAX_PENDING']:
+                # El volcado lo hace el hilo de fondo, no la petición
+                self._wake.set()
+
+    def pending(self, model, pk, field):
+        """Incremento aún no volcado para una fila (para mostrar el valor actualizado)."""
+        with self._lock:
+            return self._pending.get((model._meta.label, field, pk), 0)
+
+    def flush(self):
+        """Vuelca los incrementos pendientes en una transacción; devuelve las filas actualizadas."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+
+        groups = defaultdict(list)
+        for (label, field, pk), amount in pending.items():
+            groups[(label, field, amount)].append(pk)
+        try:
+            with transaction.atomic():
+                for (label, field, amount), pks in groups.items():
+                    _apply(apps.get_model(label), pks, field, amount)
+        except Exception:
+            # Se reponen para el siguiente volcado
+            with self._lock:
+                self._pending.update(pending)
+            raise
+        return len(pending)
+
+    def _start_flusher(self, interval):
+        self._flusher = threading.Thread(target=self._run, args=(interval,), name='dely-counters', daemon=True)
+        self._flusher.start()
+
+    def _run(self, interval):
+        while True:
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Error volcando contadores")
+            finally:
+                connections.close_all()
+
+
+buffer = CounterBuffer()
+
+
+def increment(model, pk, field, amount=1):
+    buffer.increment(model, pk, field, amount)
+
+
+def pending(model, pk, field):
+    return buffer.pending(model, pk, field)
+
+
+def flush():
+    return buffer.flush()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        buffer.flush()
+    except Exception:
+        logger.exception("Error volcando contadores al salir")
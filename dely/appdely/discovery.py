@@ -0,0 +1,67 @@
+"""Puntuación de descubrimiento ("joyas ocultas") de un negocio.
+
+    discovery_score = calificación bayesiana - VISIT_WEIGHT * ln(1 + visitas)
+                      + NEW_BOOST * max(0, 1 - días desde created_at / NEW_DAYS)
+
+La calificación combina reseñas y calificaciones rápidas (Rating) y se suaviza hacia PRIOR_RATING con PRIOR_COUNT reseñas ficticias
+(una sola reseña de 5 estrellas no basta para subir arriba). Los negocios nuevos
+reciben un empujón acotado (como mucho NEW_BOOST estrellas, menos que la
+diferencia entre una calificación buena y una mala) que se apaga linealmente en
+NEW_DAYS días; a partir de ahí la antigüedad no cuenta.
+
+La expresión es SQL puro: se guarda en Business.discovery_score (indexada) en el
+mismo UPDATE que cambia sus entradas (agregados de reseñas, contador de visitas).
+Como el empujón depende de la fecha, el comando refresh_discovery_scores lo
+recalcula a diario para los negocios creados en los últimos NEW_DAYS días.
+"""
+from django.db.models import F, FloatField, Func, Value
+from django.db.models.functions import Cast, Coalesce, Greatest, Least, Ln, NullIf
+from django.utils import timezone
+
+PRIOR_RATING = 3.0
+PRIOR_COUNT = 2
+VISIT_WEIGHT = 0.25
+NEW_BOOST = 0.25
+NEW_DAYS = 30
+
+# Entradas de la puntuación: guardar cualquiera de ellas obliga a recalcularla
+INPUT_FIELDS = {'rating_sum', 'review_count', 'star_sum', 'star_count', 'visit_count', 'created_at'}
+
+
+class EpochDays(Func):
+    """Días (con decimales) desde 1970-01-01 de una fecha-hora, calculados en la BD."""
+    output_field = FloatField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='(EXTRACT(EPOCH FROM %(expressions)s) / 86400.0)', **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='(julianday(%(expressions)s) - 2440587.5)', **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='(UNIX_TIMESTAMP(%(expressions)s) / 86400.0)', **extra_context)
+
+
+def epoch_days(moment):
+    return moment.timestamp() / 86400.0
+
+
+def rating_average(rating_sum=F('rating_sum'), review_count=F('review_count'),
+                   star_sum=F('star_sum'), star_count=F('star_count')):
+    """Promedio que se muestra y por el que se ordena: reseñas y calificaciones rápidas juntas (0 sin ninguna)."""
+    return Coalesce(
+        Cast(rating_sum + star_sum, FloatField()) / NullIf(review_count + star_count, 0),
+        Value(0.0),
+    )
+
+
+def discovery_score(rating_sum=F('rating_sum'), review_count=F('review_count'), visit_count=F('visit_count'),
+                    star_sum=F('star_sum'), star_count=F('star_count'), now=None):
+    """Expresión de la puntuación; se pueden pasar las expresiones nuevas de un UPDATE que cambia las entradas."""
+    now = timezone.now() if now is None else now
+    rating = (Cast(rating_sum + star_sum, FloatField()) + Value(PRIOR_RATING * PRIOR_COUNT)) / \
+        (review_count + star_count + Value(float(PRIOR_COUNT)))
+    visits = Ln(Cast(visit_count, FloatField()) + Value(1.0))
+    age = (Value(epoch_days(now)) - EpochDays('created_at')) / Value(float(NEW_DAYS))
+    novelty = Greatest(Value(0.0), Least(Value(1.0), Value(1.0) - age))
+    return rating - Value(VISIT_WEIGHT) * visits + Value(NEW_BOOST) * novelty
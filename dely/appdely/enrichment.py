@@ -0,0 +1,96 @@
+"""Generación concurrente de descripciones con la API de completions.
+
+Las peticiones se lanzan en un pool de hilos con un máximo de peticiones en
+vuelo (concurrency) y un token bucket que limita las peticiones por segundo.
+Cada respuesta se guarda en CompletionCache con el hash SHA-256 de (modelo,
+prompt), así que un prompt que ya se pidió nunca se vuelve a pedir.
+"""
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .models import CompletionCache
+
+
+def prompt_hash(model, prompt):
+    return hashlib.sha256(f"{model}\n{prompt}".encode('utf-8')).hexdigest()
+
+
+class TokenBucket:
+    """Limitador de ritmo: rate fichas por segundo con ráfagas de hasta capacity."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloquea hasta que haya una ficha disponible y la consume."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CompletionPool:
+    """Pide completions en paralelo respetando el límite de ritmo y usando la caché.
+
+    complete(prompt) debe devolver el texto de la respuesta (p. ej. una llamada al
+    cliente de OpenAI); se ejecuta en los hilos del pool.
+    """
+
+    def __init__(self, complete, model, concurrency=4, rate=3.0, burst=None):
+        self.complete = complete
+        self.model = model
+        self.bucket = TokenBucket(rate, burst)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='dely-completions')
+        self.requested = 0
+        self.cached = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.executor.shutdown(wait=True)
+
+    def _request(self, prompt):
+        self.bucket.acquire()
+        return self.complete(prompt)
+
+    def map(self, prompts):
+        """{prompt: completion o excepción} para los prompts dados, pidiendo solo los que no están en caché."""
+        hashes = {prompt: prompt_hash(self.model, prompt) for prompt in prompts}
+        cached = dict(
+            CompletionCache.objects.filter(prompt_hash__in=set(hashes.values())).values_list('prompt_hash', 'completion')
+        )
+        results = {}
+        futures = {}
+        for prompt, digest in hashes.items():
+            if digest in cached:
+                results[prompt] = cached[digest]
+                self.cached += 1
+            elif prompt not in futures:
+                futures[prompt] = self.executor.submit(self._request, prompt)
+
+        new_entries = []
+        for prompt, future in futures.items():
+            try:
+                completion = future.result()
+            except Exception as e:
+                results[prompt] = e
+                continue
+            results[prompt] = completion
+            new_entries.append(CompletionCache(prompt_hash=hashes[prompt], model=self.model, completion=completion))
+        # Se guardan desde el hilo principal (las escrituras en SQLite no se reparten entre hilos)
+        CompletionCache.objects.bulk_create(new_entries, ignore_conflicts=True)
+        self.requested += len(futures)
+        return results
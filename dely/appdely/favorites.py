@@ -0,0 +1,96 @@
+"""Favoritos de cada usuario como un conjunto en caché.
+
+favorite_ids(user) devuelve el conjunto de ids de negocios favoritos del usuario:
+una lectura de caché y, si falta, una sola consulta que lo vuelve a llenar. Las
+páginas de listado lo cargan una vez por petición y preguntan "b.id in
+favorite_ids" por cada tarjeta, sin consultas por tarjeta.
+
+set_favorite() marca o desmarca un negocio con una sola sentencia sobre el par
+único (usuario, negocio): INSERT que ignora el duplicado o DELETE. Al confirmar
+la transacción se borra el conjunto del usuario y se invalida su grupo de
+páginas cacheadas (page_group), sin tocar las páginas de los demás usuarios.
+Los cambios hechos por otras vías (admin, borrado en cascada) invalidan lo mismo
+con las señales de Favorite.
+
+Configuración (settings.DELY_FAVORITES):
+    ALIAS    caché de settings.CACHES a usar (por defecto 'default')
+    TIMEOUT  segundos que vive el conjunto de un usuario (por defecto 3600)
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from . import cache
+
+DEFAULTS = {
+    'ALIAS': 'default',
+    'TIMEOUT': 3600,
+}
+
+KEY_PREFIX = 'dely:favorites'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'DELY_FAVORITES', {})}
+
+
+def get_cache():
+    return caches[get_config()['ALIAS']]
+
+
+def _key(user_id):
+    return f'{KEY_PREFIX}:{user_id}'
+
+
+def _group(user_id):
+    return f'favorites:{user_id}'
+
+
+def favorite_ids(user):
+    """frozenset con los ids de los negocios favoritos del usuario (vacío si es anónimo)."""
+    if user is None or not user.is_authenticated:
+        return frozenset()
+    from .models import Favorite
+
+    store = get_cache()
+    ids = store.get(_key(user.pk))
+    if ids is None:
+        ids = frozenset(Favorite.objects.filter(user_id=user.pk).values_list('business_id', flat=True))
+        store.set(_key(user.pk), ids, get_config()['TIMEOUT'])
+    return ids
+
+
+def page_group(request):
+    """Grupo de caché de páginas propio del usuario, para cache_view (None si es anónimo)."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None
+    return _group(user.pk)
+
+
+def invalidate(user_id):
+    get_cache().delete(_key(user_id))
+    cache.invalidate(_group(user_id))
+
+
+def set_favorite(user_id, business_id, favorite=None):
+    """Marca (favorite=True), desmarca (False) o alterna (None) un favorito; devuelve el estado final.
+
+    Lanza IntegrityError si el negocio no existe.
+    """
+    from .models import Favorite
+
+    with transaction.atomic():
+        pair = Favorite.objects.filter(user_id=user_id, business_id=business_id)
+        if favorite is None:
+            # Alternar: si no había nada que borrar, se inserta
+            favorite = not pair.delete()[0]
+            if favorite:
+                Favorite.objects.bulk_create([Favorite(user_id=user_id, business_id=business_id)], ignore_conflicts=True)
+        elif favorite:
+            Favorite.objects.bulk_create([Favorite(user_id=user_id, business_id=business_id)], ignore_conflicts=True)
+        else:
+            pair.delete()
+        # bulk_create no dispara señales: se invalida aquí
+        transaction.on_commit(lambda: invalidate(user_id))
+    return favorite
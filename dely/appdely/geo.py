@@ -0,0 +1,163 @@
+"""Utilidades geográficas: geohash, prefiltro por caja delimitadora y puntuación vectorizada de distancias."""
+from math import asin, cos, degrees, isfinite, pi, radians, sin
+
+import numpy as np
+
+# Alfabeto base32 estándar de geohash
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # ~4.8m x 4.8m, suficiente para ubicar un local
+
+# Radio de la Tierra en km
+EARTH_RADIUS_KM = 6371
+# Derivado del mismo radio que Haversine: con otro valor la caja queda más chica que el círculo
+KM_PER_DEGREE_LAT = EARTH_RADIUS_KM * pi / 180
+
+
+def encode_geohash(lat, lon, precision=GEOHASH_PRECISION):
+    """Codifica (lat, lon) como geohash de la precisión indicada."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    lat, lon = float(lat), float(lon)
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # los bits pares corresponden a la longitud
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def decode_cell(cell):
+    """Límites (min_lat, max_lat, min_lon, max_lon) de una celda geohash."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in cell:
+        bits = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (bits >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+
+def cell_size(precision):
+    """Devuelve (alto, ancho) en grados de una celda geohash de la precisión dada."""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lon_bits)
+
+
+def check_search_area(lat, lon, distance_km):
+    """Valida el centro y el radio de una búsqueda; lanza ValueError si alguno no es finito o el radio es negativo."""
+    lat, lon, distance_km = float(lat), float(lon), float(distance_km)
+    if not (isfinite(lat) and isfinite(lon) and isfinite(distance_km)) or distance_km < 0:
+        raise ValueError("Coordenadas o distancia de búsqueda inválidas")
+    return lat, lon, distance_km
+
+
+def bounding_box(lat, lon, distance_km):
+    """Caja (min_lat, max_lat, min_lon, max_lon) que contiene el círculo de radio distance_km."""
+    lat, lon, distance_km = check_search_area(lat, lon, distance_km)
+    dlat = distance_km / KM_PER_DEGREE_LAT
+    # Mayor diferencia de longitud dentro del círculo (tangente al paralelo: algo más ancha
+    # que distance_km / (km por grado · cos(lat))). Cerca de los polos se usa todo el rango
+    cos_lat = cos(radians(lat))
+    angular = distance_km / EARTH_RADIUS_KM
+    if angular >= pi / 2 or sin(angular) >= cos_lat:
+        dlon = 180.0
+    else:
+        dlon = min(degrees(asin(sin(angular) / cos_lat)), 180.0)
+    return (
+        max(lat - dlat, -90.0),
+        min(lat + dlat, 90.0),
+        lon - dlon,
+        lon + dlon,
+    )
+
+
+def covering_cells(lat, lon, distance_km):
+    """Prefijos geohash que cubren el círculo de búsqueda.
+
+    Se elige la precisión más fina cuya celda es al menos tan grande como el radio,
+    así la celda del usuario y sus 8 vecinas cubren toda la caja delimitadora.
+    Devuelve una lista vacía si el radio es tan grande que no vale la pena prefiltrar.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, distance_km)
+    half_h = (max_lat - min_lat) / 2
+    half_w = (max_lon - min_lon) / 2
+
+    precision = 0
+    for p in range(1, GEOHASH_PRECISION + 1):
+        cell_h, cell_w = cell_size(p)
+        if cell_h >= half_h and cell_w >= half_w:
+            precision = p
+        else:
+            break
+    if precision == 0:
+        return []
+
+    cell_h, cell_w = cell_size(precision)
+    lat, lon = float(lat), float(lon)
+    cells = set()
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            cell_lat = lat + i * cell_h
+            if not -90.0 <= cell_lat <= 90.0:
+                continue
+            cell_lon = (lon + j * cell_w + 180.0) % 360.0 - 180.0
+            cells.add(encode_geohash(cell_lat, cell_lon, precision))
+    return sorted(cells)
+
+
+def haversine_km(user_lat, user_lon, lats, lons):
+    """Distancias Haversine en km desde el usuario a todos los puntos, en una sola pasada vectorizada."""
+    lat1 = np.radians(np.asarray(lats, dtype=np.float64))
+    lon1 = np.radians(np.asarray(lons, dtype=np.float64))
+    lat2 = radians(float(user_lat))
+    lon2 = radians(float(user_lon))
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * cos(lat2) * np.sin(dlon / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def score_nearby(ids, lats, lons, user_lat, user_lon, max_distance, limit=None):
+    """Puntúa un lote de candidatos y devuelve [(id, distancia_km)] ordenado por distancia.
+
+    Solo se conservan los que están a max_distance km o menos; con limit se
+    devuelven únicamente los limit más cercanos (selección parcial, sin ordenar todo).
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    if ids.size == 0 or (limit is not None and limit <= 0):
+        return []
+    distances = haversine_km(user_lat, user_lon, lats, lons)
+
+    within = np.flatnonzero(distances <= max_distance)
+    # Se ordena por la distancia ya redondeada y luego por id: orden total y estable,
+    # apto para paginar con cursor (ver pagination.paginate_ranked)
+    rounded = np.round(distances, 2)
+    if limit is not None and within.size > limit:
+        within = within[np.argpartition(rounded[within], limit - 1)[:limit]]
+    order = within[np.lexsort((ids[within], rounded[within]))]
+    return [(int(i), float(d)) for i, d in zip(ids[order], rounded[order])]
@@ -0,0 +1,81 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, OperationalError
+from django.db.models import Sum
+
+from appdely.models import InsufficientPoints, Point, PointBalance
+
+User = get_user_model()
+
+
+def run_redemptions(user, workers, attempts, cost, max_retries=50):
+    """Lanza attempts canjes de cost puntos con workers hilos contra el saldo de user.
+
+    Un canje que choca con un bloqueo (p. ej. "database is locked" en SQLite) se
+    reintenta hasta max_retries veces y luego cuenta como error. Devuelve
+    (resultados, segundos), con 'ok', 'rejected' o 'error' por intento.
+    """
+    def redeem(_):
+        try:
+            for _ in range(max_retries + 1):
+                try:
+                    PointBalance.redeem(user, cost, description='Canje de prueba')
+                    return 'ok'
+                except InsufficientPoints:
+                    return 'rejected'
+                except OperationalError:
+                    time.sleep(0.005)
+            return 'error'
+        finally:
+            connection.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(redeem, range(attempts)))
+    return results, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = ("Lanza canjes concurrentes contra el saldo de un usuario desechable, mide el ritmo "
+            "y comprueba que el saldo nunca queda en negativo")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help="Canjeadores en paralelo")
+        parser.add_argument('--attempts', type=int, default=200, help="Canjes totales a intentar")
+        parser.add_argument('--cost', type=int, default=5, help="Puntos por canje")
+        parser.add_argument('--balance', type=int, default=None,
+                            help="Saldo inicial (por defecto alcanza para la mitad de los intentos)")
+        parser.add_argument('--max-retries', type=int, default=50, help="Reintentos por canje ante bloqueos")
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        attempts = options['attempts']
+        cost = options['cost']
+        initial = options['balance'] if options['balance'] is not None else cost * (attempts // 2)
+
+        # Usuario nuevo con nombre único: nunca se tocan cuentas existentes y se borra al terminar
+        user = User.objects.create(username=f'benchmark-{uuid.uuid4().hex[:16]}', is_active=False)
+        try:
+            Point.objects.create(user=user, amount=initial, description='Saldo de prueba', movement_type='earn')
+            results, elapsed = run_redemptions(user, workers, attempts, cost, options['max_retries'])
+            balance = PointBalance.objects.get(user=user).total
+            history = Point.objects.filter(user=user).aggregate(total=Sum('amount'))['total'] or 0
+        finally:
+            user.delete()
+
+        ok = results.count('ok')
+        rejected = results.count('rejected')
+        errors = results.count('error')
+        self.stdout.write(
+            f"{attempts} canjes con {workers} hilos en {elapsed:.2f}s ({attempts / elapsed:.0f} canjes/s, "
+            f"{ok / elapsed:.0f} aceptados/s): {ok} aceptados, {rejected} rechazados, {errors} errores"
+        )
+        self.stdout.write(f"Saldo inicial {initial}, final {balance}, historial {history}")
+
+        if balance < 0 or balance != history or balance != initial - ok * cost:
+            raise CommandError("❌ El saldo no cuadra: hubo sobregiro o movimientos perdidos")
+        self.stdout.write(self.style.SUCCESS("✅ Sin sobregiros"))
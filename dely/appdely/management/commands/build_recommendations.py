@@ -0,0 +1,91 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from appdely import cache
+from appdely.models import BusinessSimilarity, ImportJob, Review
+from appdely.recommendations import TOP_K, InteractionMatrix
+from appdely.utils import chunked
+
+COMMAND = 'build_recommendations'
+SOURCE = 'reviews+favorites'
+
+
+class Command(BaseCommand):
+    help = "Calcula los negocios similares (filtrado colaborativo ítem-ítem) a partir de reseñas y favoritos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help="Recalcular todos los negocios (por defecto solo los afectados desde la última ejecución)")
+        parser.add_argument('--k', type=int, default=TOP_K, help="Vecinos guardados por negocio")
+        parser.add_argument('--block-size', type=int, default=1000, help="Negocios por bloque (una transacción por bloque)")
+
+    def handle(self, *args, **kwargs):
+        last = (
+            ImportJob.objects.filter(command=COMMAND, status=ImportJob.COMPLETED)
+            .order_by('-started_at').first()
+        )
+        full = kwargs['full'] or last is None
+        job = ImportJob.objects.create(command=COMMAND, source=SOURCE, source_signature='full' if full else 'incremental')
+
+        try:
+            matrix = InteractionMatrix.build()
+            if full:
+                columns = range(len(matrix.business_ids))
+            else:
+                # Reseñas nuevas o editadas desde el inicio de la última ejecución completada.
+                # Los favoritos y las reseñas borradas no dejan rastro: los recoge --full
+                changed = set(
+                    Review.objects.filter(updated_at__gte=last.started_at)
+                    .values_list('business_id', flat=True).distinct()
+                )
+                # Cambia la columna de esos negocios y, con ella, su similitud con todo lo co-valorado
+                columns = matrix.co_rated(matrix.columns(changed))
+            self.stdout.write(
+                f"{'Recalculo completo' if full else 'Recalculo incremental'}: {len(columns)} negocios "
+                f"({matrix.matrix.shape[0]} usuarios, {matrix.matrix.nnz} interacciones)"
+            )
+
+            rewritten = 0
+            for block in chunked(columns, kwargs['block_size']):
+                neighbours = self.changed(matrix.neighbours(block, k=kwargs['k']))
+                with transaction.atomic():
+                    BusinessSimilarity.objects.filter(business_id__in=[business_id for business_id, _ in neighbours]).delete()
+                    BusinessSimilarity.objects.bulk_create([
+                        BusinessSimilarity(business_id=business_id, similar_id=similar_id, score=score)
+                        for business_id, similar in neighbours
+                        for similar_id, score in similar
+                    ], batch_size=5000)
+                    job.checkpoint(len(block))
+                rewritten += len(neighbours)
+
+            if full:
+                # Negocios que ya no tienen interacciones
+                stale = set(BusinessSimilarity.objects.values_list('business_id', flat=True).distinct())
+                stale -= set(matrix.business_ids.tolist())
+                for business_ids in chunked(stale, 500):
+                    BusinessSimilarity.objects.filter(business_id__in=business_ids).delete()
+            job.finish()
+        except Exception as e:
+            job.fail(e)
+            self.stderr.write(self.style.ERROR(f"Error calculando recomendaciones: {e}"))
+            return
+        finally:
+            # Las escrituras en bloque no disparan señales: se invalidan aquí las páginas cacheadas
+            cache.invalidate('business')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Similitudes calculadas para {job.rows_done} negocios ({rewritten} con vecinos nuevos)"
+        ))
+
+    def changed(self, neighbours):
+        """Solo los negocios cuya lista de vecinos difiere de la guardada: el resto no se reescribe."""
+        stored = {}
+        rows = (
+            BusinessSimilarity.objects.filter(business_id__in=[business_id for business_id, _ in neighbours])
+            .order_by('business_id', '-score', 'similar_id').values_list('business_id', 'similar_id', 'score')
+        )
+        for business_id, similar_id, score in rows:
+            stored.setdefault(business_id, []).append((similar_id, round(score, 9)))
+        return [
+            (business_id, similar) for business_id, similar in neighbours
+            if stored.get(business_id, []) != [(similar_id, round(score, 9)) for similar_id, score in similar]
+        ]
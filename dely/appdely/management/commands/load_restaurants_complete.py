@@ -1,118 +1,179 @@
 import csv
 import os
-import re
-import unicodedata
-from collections import defaultdict
+from contextlib import nullcontext
+from itertools import islice
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from appdely.models import Business, BusinessType, BusinessImage
+from django.db import transaction
+from django.utils import timezone
+from appdely import cache, nearby_cache, search
+from appdely.models import Business, BusinessType, BusinessImage, ImportJob
+from appdely.staging import ImageStaging
+from appdely.utils import chunked, normalize_name
+
+# Campos que el CSV de descripciones actualiza en negocios existentes
+CSV_FIELDS = ['address', 'description', 'phone_number', 'email', 'status', 'business_type_id']
+UPDATE_FIELDS = ['address', 'description', 'phone_number', 'email', 'status', 'business_type', 'updated_at']
+
 
 class Command(BaseCommand):
     help = "Carga restaurantes completos desde CSVs directamente a la base de datos"
 
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Filas por lote (una transacción por lote)")
+        parser.add_argument('--resume', action='store_true',
+                            help="Continuar la última ejecución interrumpida desde su punto de control")
+        parser.add_argument('--no-prune', action='store_true',
+                            help="Solo añadir imágenes, sin borrar las que ya no están en el CSV")
+
     def handle(self, *args, **kwargs):
-        # --- Función para normalizar nombres ---
-        def normalize_name(s):
-            if not s:
-                return ""
-            s = s.lower().strip()
-            s = unicodedata.normalize("NFKD", s)
-            s = s.encode("ascii", "ignore").decode("ascii")  # quita tildes
-            s = s.replace("&", "and").replace(".", " ")
-            s = re.sub(r"[^\w\s]", " ", s)  # elimina puntuación
-            s = re.sub(r"\s+", " ", s).strip()
-            return s
+        chunk_size = kwargs['chunk_size']
+        self.prune = not kwargs['no_prune']
 
         # Rutas de archivos
         images_file = os.path.join(settings.BASE_DIR, "imagenes_restaurantes.csv")
         descriptions_file = os.path.join(settings.BASE_DIR, "descripcion_restaurantes.csv")
 
-        # --- 1. Cargar imágenes en memoria ---
-        images_dict = defaultdict(list)
+        if not os.path.exists(descriptions_file):
+            self.stderr.write(self.style.ERROR(f"Archivo requerido no encontrado: {descriptions_file}"))
+            return
+
+        # --- 1. Volcar imágenes a una tabla temporal indexada (memoria acotada) ---
+        images = None
         if os.path.exists(images_file):
             try:
-                with open(images_file, newline="", encoding="utf-8") as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        name = row.get("Business_Nombre", "")
-                        url = row.get("Imagen_URL", "")
-                        if url and url.strip():
-                            norm_name = normalize_name(name)
-                            images_dict[norm_name].append(url.strip())
-                self.stdout.write(f"📷 Imágenes cargadas: {len(images_dict)} restaurantes")
+                images = ImageStaging()
+                images.load(images_file)
+                self.stdout.write(f"📷 Imágenes cargadas: {images.restaurants} restaurantes")
             except Exception as e:
+                if images:
+                    images.close()
                 self.stderr.write(f"Error leyendo imágenes: {e}")
                 return
         else:
             self.stdout.write("⚠️ Archivo de imágenes no encontrado, continuando sin imágenes")
 
-        # --- 2. Procesar restaurantes desde descripciones ---
-        if not os.path.exists(descriptions_file):
-            self.stderr.write(self.style.ERROR(f"Archivo requerido no encontrado: {descriptions_file}"))
-            return
+        # --- 2. Procesar restaurantes desde descripciones, por lotes ---
+        # Los tipos son pocos y se cachean; los negocios se resuelven con una consulta por lote
+        self.types = {t.description: t for t in BusinessType.objects.all()}
+
+        self.created_count = 0
+        self.updated_count = 0
+        self.unchanged_count = 0
+        self.images_count = 0
+        self.removed_images_count = 0
+
+        job = ImportJob.start('load_restaurants_complete', descriptions_file, resume=kwargs['resume'])
+        if job.rows_done:
+            self.stdout.write(f"⏩ Reanudando desde la fila {job.rows_done}")
 
         try:
-            with open(descriptions_file, newline="", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                
-                created_count = 0
-                updated_count = 0
-                
-                for row in reader:
-                    business_name = row.get("business_name", "").strip()
-                    if not business_name:
-                        continue
-                    
-                    address = row.get("address", "")
-                    description = row.get("description", "")
-                    phone = row.get("phone_number", "")
-                    email = row.get("email", "")
-                    status = row.get("status", "True") in ["True", "1", "true"]
-                    type_desc = row.get("business_type", "Restaurante")
-
-                    # Crear o obtener tipo de negocio
-                    business_type, _ = BusinessType.objects.get_or_create(description=type_desc)
-
-                    # Crear o actualizar negocio
-                    business, created = Business.objects.update_or_create(
-                        business_name=business_name,
-                        defaults={
-                            "address": address,
-                            "description": description,
-                            "phone_number": phone,
-                            "email": email,
-                            "status": status,
-                            "business_type": business_type,
-                        }
-                    )
-
-                    if created:
-                        created_count += 1
-                        self.stdout.write(f"✅ Creado: {business_name}")
-                    else:
-                        updated_count += 1
-                        self.stdout.write(f"🔄 Actualizado: {business_name}")
-
-                    # --- 3. Agregar imágenes al negocio ---
-                    norm_name = normalize_name(business_name)
-                    urls = images_dict.get(norm_name, [])
-                    
-                    for url in urls:
-                        # Evitar duplicados
-                        if not BusinessImage.objects.filter(business=business, image_url=url).exists():
-                            BusinessImage.objects.create(
-                                business=business,
-                                image_url=url
-                            )
-                    
-                    if urls:
-                        self.stdout.write(f"   📷 {len(urls)} imágenes agregadas")
-
-                # Resumen final
-                self.stdout.write(self.style.SUCCESS(f"\n🎉 Proceso completado:"))
-                self.stdout.write(f"   • Restaurantes creados: {created_count}")
-                self.stdout.write(f"   • Restaurantes actualizados: {updated_count}")
-                self.stdout.write(f"   • Total procesados: {created_count + updated_count}")
+            with images or nullcontext(), open(descriptions_file, newline="", encoding="utf-8") as f:
+                reader = islice(csv.DictReader(f), job.rows_done, None)
+                for rows in chunked(reader, chunk_size):
+                    # El punto de control se confirma en la misma transacción que el lote
+                    with transaction.atomic():
+                        self.load_chunk(rows, images)
+                        job.checkpoint(len(rows))
+                    self.stdout.write(f"   … {job.rows_done} filas procesadas")
+            job.finish()
+
+            # Resumen final
+            self.stdout.write(self.style.SUCCESS(f"\n🎉 Proceso completado:"))
+            self.stdout.write(f"   • Restaurantes creados: {self.created_count}")
+            self.stdout.write(f"   • Restaurantes actualizados: {self.updated_count}")
+            self.stdout.write(f"   • Restaurantes sin cambios: {self.unchanged_count}")
+            self.stdout.write(f"   • Imágenes agregadas: {self.images_count}")
+            self.stdout.write(f"   • Imágenes eliminadas: {self.removed_images_count}")
+            self.stdout.write(f"   • Total procesados: {self.created_count + self.updated_count + self.unchanged_count}")
 
         except Exception as e:
-            self.stderr.write(self.style.ERROR(f"Error procesando restaurantes: {e}"))
\ No newline at end of file
+            job.fail(e)
+            self.stderr.write(self.style.ERROR(f"Error procesando restaurantes: {e}"))
+            self.stderr.write(f"Se puede continuar con --resume desde la fila {job.rows_done}")
+        finally:
+            # Las escrituras en bloque no disparan señales: se invalidan aquí las páginas cacheadas
+            # y los candidatos de cercanía (el upsert puede cambiar el estado de los negocios)
+            cache.invalidate('business')
+            nearby_cache.clear()
+
+    def load_chunk(self, rows, images):
+        """Crea o actualiza en bloque los negocios de un lote, con sus tipos e imágenes."""
+        # Una fila por nombre: si se repite en el lote, gana la última (como al procesar en orden)
+        parsed = {}
+        for row in rows:
+            business_name = row.get("business_name", "").strip()
+            if not business_name:
+                continue
+            parsed[business_name] = {
+                "address": row.get("address", ""),
+                "description": row.get("description", ""),
+                "phone_number": row.get("phone_number", ""),
+                "email": row.get("email", ""),
+                "status": row.get("status", "True") in ["True", "1", "true"],
+                "type_desc": row.get("business_type", "Restaurante"),
+            }
+        if not parsed:
+            return
+
+        existing_rows = {}
+        for row in (
+            Business.objects.filter(business_name__in=list(parsed)).order_by('-id').values('id', 'business_name', *CSV_FIELDS)
+        ):
+            existing_rows[row['business_name']] = row  # con nombres repetidos gana el de menor id
+
+        now = timezone.now()
+        with transaction.atomic():
+            # Crear los tipos de negocio que falten
+            new_types = {
+                data["type_desc"] for data in parsed.values() if data["type_desc"] not in self.types
+            }
+            if new_types:
+                BusinessType.objects.bulk_create([BusinessType(description=d) for d in new_types])
+                for business_type in BusinessType.objects.filter(description__in=new_types):
+                    self.types[business_type.description] = business_type
+
+            to_create, to_update, unchanged = [], [], []
+            for business_name, data in parsed.items():
+                existing = existing_rows.get(business_name)
+                business = Business(
+                    id=existing['id'] if existing else None,
+                    business_name=business_name,
+                    business_type=self.types[data.pop("type_desc")],
+                    updated_at=now,
+                    **data,
+                )
+                if not existing:
+                    to_create.append(business)
+                elif any(getattr(business, field) != existing[field] for field in CSV_FIELDS):
+                    to_update.append(business)
+                else:
+                    # Sin cambios: no se reescribe ni se reindexa (solo se revisan sus imágenes)
+                    unchanged.append(business)
+
+            Business.objects.bulk_create(to_create)
+            # Upsert por clave primaria (INSERT ... ON CONFLICT (id) DO UPDATE): mucho más
+            # barato que bulk_update, que genera un CASE WHEN por fila y campo
+            Business.objects.bulk_create(
+                to_update, update_conflicts=True, unique_fields=['id'], update_fields=UPDATE_FIELDS,
+            )
+            # bulk_create/bulk_update no disparan señales: se actualizan aquí el índice de
+            # búsqueda y la puntuación de descubrimiento de los nuevos (el CSV no toca sus entradas)
+            search.index_objects(Business, to_create + to_update)
+            Business.objects.filter(id__in=[b.id for b in to_create]).refresh_discovery_score()
+
+            # --- 3. Sincronizar las imágenes de los negocios que aparecen en el CSV de imágenes ---
+            businesses = to_create + to_update + unchanged
+            urls_by_name = images.lookup(normalize_name(b.business_name) for b in businesses) if images else {}
+            urls_by_business = {
+                business.id: urls_by_name[norm_name]
+                for business in businesses
+                if (norm_name := normalize_name(business.business_name)) in urls_by_name
+            }
+            added, removed = BusinessImage.sync(urls_by_business, prune=self.prune)
+
+        self.created_count += len(to_create)
+        self.updated_count += len(to_update)
+        self.unchanged_count += len(unchanged)
+        self.images_count += added
+        self.removed_images_count += removed
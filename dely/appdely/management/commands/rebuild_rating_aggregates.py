@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from appdely.models import Business
+
+
+class Command(BaseCommand):
+    help = "Recalcula los agregados de calificación (reseñas, calificaciones rápidas y rating_avg) desde sus tablas"
+
+    def add_arguments(self, parser):
+        parser.add_argument('business_ids', nargs='*', type=int, help="IDs de negocios a recalcular (por defecto todos)")
+
+    def handle(self, *args, **options):
+        businesses = Business.objects.all()
+        if options['business_ids']:
+            businesses = businesses.filter(pk__in=options['business_ids'])
+
+        updated = businesses.rebuild_rating_aggregates()
+        self.stdout.write(self.style.SUCCESS(f"✅ Agregados recalculados para {updated} negocios"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from appdely import search
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de texto completo (negocios, promociones y noticias)"
+
+    def handle(self, *args, **kwargs):
+        backend = search.get_backend()
+        if backend is None:
+            self.stderr.write(self.style.ERROR(f"No hay backend de búsqueda para '{connection.vendor}'"))
+            return
+
+        with connection.cursor() as cursor:
+            backend.create_schema(cursor)
+
+        for model, kind in search.registered_models():
+            count = search.rebuild(model)
+            self.stdout.write(f"🔎 {kind}: {count} documentos indexados")
+
+        self.stdout.write(self.style.SUCCESS("✅ Índice reconstruido"))
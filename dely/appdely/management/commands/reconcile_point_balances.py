@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from appdely.models import PointBalance
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los saldos de puntos (PointBalance) desde el historial de movimientos (Point)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int, help="IDs de usuarios a reconciliar (por defecto todos)")
+
+    def handle(self, *args, **options):
+        changed = PointBalance.rebuild(user_ids=options['user_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f"✅ Saldos reconciliados: {changed} corregidos"))
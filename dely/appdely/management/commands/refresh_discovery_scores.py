@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from appdely import cache
+from appdely.discovery import NEW_DAYS
+from appdely.models import Business
+
+# Margen para que un negocio que sale de la ventana reciba su última actualización
+# aunque el comando deje de ejecutarse algún día
+GRACE_DAYS = 7
+
+
+class Command(BaseCommand):
+    help = ("Recalcula discovery_score de los negocios recientes (el empujón de novedad decae con los días); "
+            "pensado para ejecutarse a diario")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Recalcular todos los negocios")
+
+    def handle(self, *args, **options):
+        businesses = Business.objects.all()
+        if not options['all']:
+            businesses = businesses.filter(created_at__gte=timezone.now() - timedelta(days=NEW_DAYS + GRACE_DAYS))
+
+        updated = businesses.refresh_discovery_score()
+        # Un UPDATE masivo no dispara señales: se invalidan aquí las páginas cacheadas
+        cache.invalidate('business')
+        self.stdout.write(self.style.SUCCESS(f"✅ Puntuación de descubrimiento recalculada para {updated} negocios"))
@@ -1,37 +1,66 @@
 import os
 import csv
+from contextlib import nullcontext
+from itertools import islice
 from openai import OpenAI
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db import transaction
 from dotenv import load_dotenv
-from appdely.models import Business, BusinessType  # ✅ Corregido: tu app se llama 'appdely'
+from appdely.enrichment import CompletionPool
+from appdely.models import Business, BusinessType, ImportJob  # ✅ Corregido: tu app se llama 'appdely'
+from appdely.utils import chunked
 
 class Command(BaseCommand):
     help = "Update or create restaurant/cafe descriptions from CSV using OpenAI API"
 
+    def add_arguments(self, parser):
+        parser.add_argument("--ai", action="store_true",
+                            help="Reescribir las descripciones con la API (por defecto se usa la del CSV)")
+        parser.add_argument("--model", default="gpt-3.5-turbo", help="Modelo de completions")
+        parser.add_argument("--concurrency", type=int, default=4, help="Peticiones simultáneas a la API")
+        parser.add_argument("--rate", type=float, default=3.0, help="Peticiones por segundo (token bucket)")
+        parser.add_argument("--burst", type=int, default=None, help="Ráfaga máxima (por defecto igual a --rate)")
+        parser.add_argument("--chunk-size", type=int, default=50, help="Filas del CSV por lote")
+        parser.add_argument("--base-url", default=None,
+                            help="URL base de una API compatible con OpenAI (p. ej. un servidor local de pruebas)")
+        parser.add_argument("--resume", action="store_true",
+                            help="Continuar la última ejecución interrumpida desde su punto de control")
+
     def handle(self, *args, **kwargs):
         # ✅ Load environment variables from the .env file
         load_dotenv()  # Carga desde .env en el directorio actual (dely/)
 
-        # ✅ Initialize the OpenAI client
-        api_key = os.environ.get("OPENAI_API_KEY")  # Variable estándar de OpenAI
-        
-        if not api_key:
-            self.stderr.write(self.style.ERROR("❌ OPENAI_API_KEY no encontrada en las variables de entorno"))
-            self.stderr.write("Crea un archivo .env con: OPENAI_API_KEY=tu_api_key_aquí")
-            return
-
-        client = OpenAI(api_key=api_key)
-
-        # ✅ Helper function to send prompt and get completion from OpenAI
-        def get_completion(prompt, model="gpt-3.5-turbo"):
-            messages = [{"role": "user", "content": prompt}]
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0,
+        # ✅ Las peticiones a la API solo se hacen con --ai
+        pool = None
+        if kwargs["ai"]:
+            # ✅ Initialize the OpenAI client
+            api_key = os.environ.get("OPENAI_API_KEY")  # Variable estándar de OpenAI
+            base_url = kwargs["base_url"] or os.environ.get("OPENAI_BASE_URL")
+
+            if not api_key and not base_url:
+                self.stderr.write(self.style.ERROR("❌ OPENAI_API_KEY no encontrada en las variables de entorno"))
+                self.stderr.write("Crea un archivo .env con: OPENAI_API_KEY=tu_api_key_aquí")
+                return
+
+            client = OpenAI(api_key=api_key or "local", base_url=base_url)
+            model = kwargs["model"]
+
+            # ✅ Helper function to send prompt and get completion from OpenAI
+            def get_completion(prompt):
+                messages = [{"role": "user", "content": prompt}]
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0,
+                )
+                return response.choices[0].message.content.strip()
+
+            # ✅ Las peticiones de cada lote van en paralelo
+            pool = CompletionPool(
+                get_completion, model,
+                concurrency=kwargs["concurrency"], rate=kwargs["rate"], burst=kwargs["burst"],
             )
-            return response.choices[0].message.content.strip()
 
         # ✅ Instruction to guide the AI
         instruction = (
@@ -48,53 +77,110 @@ class Command(BaseCommand):
             self.stderr.write(self.style.ERROR(f"CSV not found: {csv_path}"))
             return
 
-        # ✅ Leer CSV
-        with open(csv_path, newline="", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-
-            for row in reader:
-                name = row.get("business_name")
-                address = row.get("address")
-                description = row.get("description", "")
-                phone = row.get("phone_number")
-                email = row.get("email")
-                status = row.get("status", "True") in ["True", "1", "true"]
-                type_desc = row.get("business_type")
-
-                self.stdout.write(f"Procesando: {name}")
-
-                try:
-                    # ✅ Buscar o crear tipo de negocio
-                    business_type, _ = BusinessType.objects.get_or_create(description=type_desc)
-
-                    # ✅ Prompt para la IA (temporalmente desactivado)
-                    # prompt = (
-                    #     f"{instruction} "
-                    #     f"Descripción original: '{description}'. "
-                    #     f"Nombre del negocio: '{name}'."
-                    # )
-
-                    # ✅ Obtener descripción mejorada (temporalmente usar descripción original)
-                    # updated_description = get_completion(prompt)
-                    updated_description = description or f"Restaurante {name} - Excelente lugar para disfrutar de buena comida en un ambiente acogedor."
-
-                    # ✅ Guardar en DB
-                    business, created = Business.objects.update_or_create(
-                        business_name=name,
-                        defaults={
-                            "address": address,
-                            "description": updated_description,
-                            "phone_number": phone,
-                            "email": email,
-                            "status": status,
-                            "business_type": business_type,
-                        },
-                    )
-
-                    if created:
-                        self.stdout.write(self.style.SUCCESS(f"Creado: {business.business_name}"))
-                    else:
-                        self.stdout.write(self.style.SUCCESS(f"Actualizado: {business.business_name}"))
-
-                except Exception as e:
-                    self.stderr.write(f"❌ Error con {name}: {str(e)}")
\ No newline at end of file
+        self.counts = {"created": 0, "updated": 0, "unchanged": 0, "errors": 0}
+
+        # ✅ Leer CSV por lotes
+        job = ImportJob.start("update_descriptions", csv_path, resume=kwargs["resume"])
+        if job.rows_done:
+            self.stdout.write(f"⏩ Reanudando desde la fila {job.rows_done}")
+
+        failed = False
+        try:
+            with pool or nullcontext(), open(csv_path, newline="", encoding="utf-8") as csvfile:
+                reader = islice(csv.DictReader(csvfile), job.rows_done, None)
+                for rows in chunked(reader, kwargs["chunk_size"]):
+                    # El punto de control se confirma en la misma transacción que el lote y
+                    # solo avanza hasta la primera fila con error: --resume la reintenta (las
+                    # filas posteriores ya guardadas se saltan como "sin cambios")
+                    with transaction.atomic():
+                        failed_at = self.process_chunk(rows, instruction, pool)
+                        if not failed:
+                            job.checkpoint(len(rows) if failed_at is None else failed_at)
+                            failed = failed_at is not None
+            if failed:
+                job.fail(f"{self.counts['errors']} filas con error")
+                self.stderr.write(self.style.ERROR(f"❌ {self.counts['errors']} filas con error"))
+                self.stderr.write(f"Se pueden reintentar con --resume desde la fila {job.rows_done}")
+            else:
+                job.finish()
+        except Exception as e:
+            job.fail(e)
+            self.stderr.write(self.style.ERROR(f"❌ Error procesando el CSV: {e}"))
+            self.stderr.write(f"Se puede continuar con --resume desde la fila {job.rows_done}")
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Creados: {self.counts['created']}, actualizados: {self.counts['updated']}, "
+            f"sin cambios: {self.counts['unchanged']}, errores: {self.counts['errors']}"
+            + (f" ({pool.requested} peticiones a la API, {pool.cached} respuestas en caché)" if pool else "")
+        ))
+
+    def process_chunk(self, rows, instruction, pool):
+        """Procesa un lote; devuelve la posición en rows de la primera fila con error, o None."""
+        prompts = {}
+        for row in rows:
+            if not row.get("business_name"):
+                continue
+            # ✅ Prompt para la IA
+            prompts[row["business_name"]] = (
+                f"{instruction} "
+                f"Descripción original: '{row.get('description', '')}'. "
+                f"Nombre del negocio: '{row['business_name']}'."
+            )
+
+        # ✅ Obtener descripciones mejoradas (solo se piden las que no están en caché);
+        # sin --ai se usa la descripción original
+        completions = pool.map(prompts.values()) if pool else {}
+
+        first_error = None
+        for position, row in enumerate(rows):
+            name = row.get("business_name")
+            if not name:
+                continue
+            type_desc = row.get("business_type")
+            if pool:
+                updated_description = completions[prompts[name]]
+            else:
+                updated_description = row.get("description") or \
+                    f"Restaurante {name} - Excelente lugar para disfrutar de buena comida en un ambiente acogedor."
+
+            if isinstance(updated_description, Exception):
+                self.counts["errors"] += 1
+                self.stderr.write(f"❌ Error con {name}: {updated_description}")
+                first_error = position if first_error is None else first_error
+                continue
+
+            try:
+                # ✅ Buscar o crear tipo de negocio
+                business_type, _ = BusinessType.objects.get_or_create(description=type_desc)
+                values = {
+                    "address": row.get("address"),
+                    "description": updated_description,
+                    "phone_number": row.get("phone_number"),
+                    "email": row.get("email"),
+                    "status": row.get("status", "True") in ["True", "1", "true"],
+                    "business_type_id": business_type.id,
+                }
+
+                # ✅ Sin cambios (misma descripción en caché y mismos datos): no se escribe
+                business = Business.objects.filter(business_name=name).order_by("id").first()
+                if business and all(getattr(business, field) == value for field, value in values.items()):
+                    self.counts["unchanged"] += 1
+                    continue
+
+                # ✅ Guardar en DB (punto de guardado: un error no invalida el resto del lote)
+                with transaction.atomic():
+                    business, created = Business.objects.update_or_create(business_name=name, defaults=values)
+
+                if created:
+                    self.counts["created"] += 1
+                    self.stdout.write(self.style.SUCCESS(f"Creado: {business.business_name}"))
+                else:
+                    self.counts["updated"] += 1
+                    self.stdout.write(self.style.SUCCESS(f"Actualizado: {business.business_name}"))
+
+            except Exception as e:
+                self.counts["errors"] += 1
+                self.stderr.write(f"❌ Error con {name}: {str(e)}")
+                first_error = position if first_error is None else first_error
+        return first_error
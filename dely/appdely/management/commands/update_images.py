@@ -1,51 +1,81 @@
-import csv
 import os
+from itertools import islice
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from collections import defaultdict
-from appdely.models import Business, BusinessImage
+from django.db import transaction
+from appdely import cache
+from appdely.models import Business, BusinessImage, ImportJob
+from appdely.staging import ImageStaging
+from appdely.utils import chunked
 
 class Command(BaseCommand):
     help = "Lee imagenes_restaurantes.csv y asigna múltiples URLs a cada Business"
 
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Negocios por lote (una transacción por lote)")
+        parser.add_argument('--resume', action='store_true',
+                            help="Continuar la última ejecución interrumpida desde su punto de control")
+        parser.add_argument('--no-prune', action='store_true',
+                            help="Solo añadir imágenes, sin borrar las que ya no están en el CSV")
+
     def handle(self, *args, **kwargs):
         # ✅ Ruta absoluta al archivo CSV
         csv_file = os.path.join(settings.BASE_DIR, "imagenes_restaurantes.csv")
-        
+
         if not os.path.exists(csv_file):
             self.stderr.write(self.style.ERROR(f"Archivo no encontrado: {csv_file}"))
             return
 
-        # Agrupamos URLs por restaurante
-        images_by_business = defaultdict(list)
+        self.prune = not kwargs['no_prune']
+        self.added = self.removed = 0
+
+        # El punto de control cuenta negocios: las URLs se agrupan por negocio (en orden
+        # alfabético) para que cada uno se sincronice con su lista completa
+        job = ImportJob.start('update_images', csv_file, resume=kwargs['resume'])
+        if job.rows_done:
+            self.stdout.write(f"⏩ Reanudando desde el negocio {job.rows_done}")
+
+        try:
+            with ImageStaging() as images:
+                images.load(csv_file)
+                for groups in chunked(islice(images.groups(), job.rows_done, None), kwargs['chunk_size']):
+                    # El punto de control se confirma en la misma transacción que el lote
+                    with transaction.atomic():
+                        self.process_chunk(groups)
+                        job.checkpoint(len(groups))
+            job.finish()
+        except Exception as e:
+            job.fail(e)
+            self.stderr.write(self.style.ERROR(f"Error procesando imágenes: {e}"))
+            self.stderr.write(f"Se puede continuar con --resume desde el negocio {job.rows_done}")
+            return
+        finally:
+            # Las escrituras en bloque no disparan señales: se invalidan aquí las páginas cacheadas
+            cache.invalidate('business')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Proceso terminado: {self.added} imágenes añadidas, {self.removed} eliminadas"
+        ))
 
-        with open(csv_file, newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                business = row.get("Business_Nombre")
-                url = row.get("Imagen_URL")
+    def process_chunk(self, groups):
+        images_by_business = dict(groups)
 
-                if business and url:
-                    images_by_business[business].append(url.strip())
+        # Negocios del lote con una sola consulta (con nombres repetidos gana el de menor id)
+        businesses = {}
+        for business in Business.objects.filter(business_name__in=list(images_by_business)).order_by('-id'):
+            businesses[business.business_name] = business
 
-        # Recorremos negocios encontrados en el CSV
+        urls_by_business = {}
         for business_name, urls in images_by_business.items():
-            try:
-                business = Business.objects.get(business_name=business_name)
-
-                for url in urls:
-                    # Evitar duplicados
-                    if not BusinessImage.objects.filter(business=business, image_url=url).exists():
-                        BusinessImage.objects.create(
-                            business=business,
-                            image_url=url
-                        )
-
-                self.stdout.write(self.style.SUCCESS(
-                    f"{business.business_name}: {len(urls)} imágenes procesadas"
-                ))
-
-            except Business.DoesNotExist:
+            business = businesses.get(business_name)
+            if business is None:
                 self.stderr.write(f"No existe en BD: {business_name}")
+                continue
+            urls_by_business[business.id] = urls
+            self.stdout.write(self.style.SUCCESS(
+                f"{business.business_name}: {len(urls)} imágenes procesadas"
+            ))
 
-        self.stdout.write(self.style.SUCCESS("✅ Proceso terminado"))
+        added, removed = BusinessImage.sync(urls_by_business, prune=self.prune)
+        self.added += added
+        self.removed += removed
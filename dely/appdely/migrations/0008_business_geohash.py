@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+from appdely.geo import encode_geohash
+
+
+def calcular_geohashes(apps, schema_editor):
+    Business = apps.get_model('appdely', 'Business')
+    pendientes = Business.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for business in pendientes.only('id', 'latitude', 'longitude').iterator():
+        business.geohash = encode_geohash(business.latitude, business.longitude)
+        business.save(update_fields=['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdely', '0007_business_review_count_alter_business_visit_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='business',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AlterField(
+            model_name='business',
+            name='image_url',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AlterField(
+            model_name='business',
+            name='menu_url',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AlterField(
+            model_name='businessimage',
+            name='image_url',
+            field=models.CharField(max_length=500),
+        ),
+        migrations.RunPython(calcular_geohashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:42
+
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def calcular_agregados(apps, schema_editor):
+    Business = apps.get_model('appdely', 'Business')
+    Review = apps.get_model('appdely', 'Review')
+    reviews = Review.objects.filter(business=OuterRef('pk')).order_by().values('business')
+    Business.objects.update(
+        rating_sum=Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), 0),
+        review_count=Coalesce(Subquery(reviews.annotate(total=Count('id')).values('total')), 0),
+    )
+    Business.objects.update(
+        rating_avg=Coalesce(Cast(F('rating_sum'), FloatField()) / NullIf(F('review_count'), 0), Value(0.0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdely', '0008_business_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='business',
+            name='rating_avg',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(calcular_agregados, migrations.RunPython.noop),
+    ]
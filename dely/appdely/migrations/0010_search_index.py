@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:20
+
+from django.db import migrations
+
+from appdely import search
+
+
+def crear_indice(apps, schema_editor):
+    backend = search.get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        backend.create_schema(cursor)
+
+    Business = apps.get_model('appdely', 'Business')
+    search.index_objects(
+        Business, Business.objects.iterator(), kind='business',
+        document=search.business_document, backend=backend, conn=schema_editor.connection,
+    )
+
+
+def eliminar_indice(apps, schema_editor):
+    backend = search.get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        backend.drop_schema(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdely', '0009_business_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
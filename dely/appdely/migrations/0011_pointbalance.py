@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+def calcular_saldos(apps, schema_editor):
+    Point = apps.get_model('appdely', 'Point')
+    PointBalance = apps.get_model('appdely', 'PointBalance')
+    rows = Point.objects.order_by().values('user_id').annotate(
+        total=Sum('amount'),
+        earned=Sum('amount', filter=Q(movement_type='earn')),
+        redeemed=Sum('amount', filter=Q(movement_type='redeem')),
+    )
+    PointBalance.objects.bulk_create([
+        PointBalance(
+            user_id=row['user_id'],
+            total=row['total'] or 0,
+            earned=row['earned'] or 0,
+            redeemed=-(row['redeemed'] or 0),
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdely', '0010_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.IntegerField(default=0)),
+                ('earned', models.PositiveIntegerField(default=0)),
+                ('redeemed', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='point_balance', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(calcular_saldos, migrations.RunPython.noop),
+    ]
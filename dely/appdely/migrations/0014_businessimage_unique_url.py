@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:03
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def eliminar_duplicados(apps, schema_editor):
+    # Se conserva la imagen más antigua de cada (negocio, URL)
+    BusinessImage = apps.get_model('appdely', 'BusinessImage')
+    keep = (
+        BusinessImage.objects.order_by().values('business_id', 'image_url')
+        .annotate(keep_id=Min('id')).values_list('keep_id', flat=True)
+    )
+    BusinessImage.objects.exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdely', '0013_importjob'),
+    ]
+
+    operations = [
+        # Antes de la restricción única, para que no falle con los duplicados existentes
+        migrations.RunPython(eliminar_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='businessimage',
+            constraint=models.UniqueConstraint(fields=('business', 'image_url'), name='unique_business_image_url'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdely', '0014_businessimage_unique_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='appdely.business')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='appdely.business')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('business', 'similar'), name='unique_business_similarity')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:25
+
+from django.db import migrations, models
+from django.db.models import Value
+
+from appdely.discovery import discovery_score
+
+
+def calcular_puntuacion(apps, schema_editor):
+    Business = apps.get_model('appdely', 'Business')
+    # Las calificaciones rápidas (star_sum/star_count) aún no existen en este punto
+    Business.objects.update(discovery_score=discovery_score(star_sum=Value(0), star_count=Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdely', '0015_businesssimilarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='business',
+            name='discovery_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.RunPython(calcular_puntuacion, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='business',
+            index=models.Index(models.OrderBy(models.F('discovery_score'), descending=True), models.F('id'), name='business_discovery_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:27
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def calcular_agregados(apps, schema_editor):
+    Business = apps.get_model('appdely', 'Business')
+    Rating = apps.get_model('appdely', 'Rating')
+    ratings = Rating.objects.filter(business=OuterRef('pk')).order_by().values('business')
+    Business.objects.update(
+        star_sum=Coalesce(Subquery(ratings.annotate(total=Sum('stars')).values('total')), 0),
+        star_count=Coalesce(Subquery(ratings.annotate(total=Count('id')).values('total')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdely', '0016_business_discovery_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='business',
+            name='star_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='star_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='rating',
+            name='previous_stars',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(calcular_agregados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:37
+
+from django.db import migrations
+
+from appdely.discovery import discovery_score
+
+
+def recalcular_puntuacion(apps, schema_editor):
+    # La recencia pasa a ser un empujón acotado para los negocios nuevos
+    Business = apps.get_model('appdely', 'Business')
+    Business.objects.update(discovery_score=discovery_score())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdely', '0017_rating_star_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(recalcular_puntuacion, migrations.RunPython.noop),
+    ]
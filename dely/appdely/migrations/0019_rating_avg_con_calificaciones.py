@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:52
+
+from django.db import migrations
+
+from appdely.discovery import discovery_score, rating_average
+
+
+def recalcular_promedios(apps, schema_editor):
+    # rating_avg y discovery_score pasan a incluir las calificaciones rápidas (Rating)
+    Business = apps.get_model('appdely', 'Business')
+    Business.objects.update(rating_avg=rating_average(), discovery_score=discovery_score())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdely', '0018_recalcular_discovery_score'),
+    ]
+
+    operations = [
+        migrations.RunPython(recalcular_promedios, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,15 @@
+import os
+
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, FloatField, OuterRef, Prefetch, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .discovery import INPUT_FIELDS as DISCOVERY_INPUT_FIELDS, discovery_score, rating_average
+from .geo import bounding_box, covering_cells, encode_geohash, score_nearby
 
 
 # Business_Types
@@ -11,6 +20,114 @@ class BusinessType(models.Model):
         return self.description
 
 
+class BusinessQuerySet(models.QuerySet):
+    def for_cards(self):
+        """Carga todo lo que pinta una tarjeta de negocio con un número fijo de consultas.
+
+        Trae el tipo con select_related y precarga solo la imagen de portada y la
+        reseña más reciente (con su usuario), expuestas como cover_image y latest_review.
+        """
+        return self.select_related('business_type').with_cover_image().prefetch_related(
+            Prefetch(
+                'review_set',
+                queryset=Review.objects.select_related('user').order_by('-date', '-id')[:1],
+                to_attr='prefetched_latest_reviews',
+            ),
+        )
+
+    def with_cover_image(self):
+        """Precarga solo la imagen de portada de cada negocio (expuesta como cover_image)."""
+        return self.prefetch_related(
+            Prefetch(
+                'images',
+                queryset=BusinessImage.objects.order_by('id')[:1],
+                to_attr='prefetched_cover_images',
+            ),
+        )
+
+    def nearby_candidates(self, lat, lon, max_distance):
+        """Prefiltra en SQL los negocios que pueden estar a menos de max_distance km.
+
+        Usa las celdas geohash (columna indexada) y la caja delimitadora en lat/lon;
+        el resultado es un superconjunto que luego se puntúa con Haversine.
+        """
+        qs = self.filter(latitude__isnull=False, longitude__isnull=False)
+
+        cells = covering_cells(lat, lon, max_distance)
+        if cells:
+            # Rango por prefijo: aprovecha el índice en cualquier motor (a diferencia de LIKE)
+            cell_filter = Q()
+            for cell in cells:
+                cell_filter |= Q(geohash__gte=cell, geohash__lt=cell + '~')
+            qs = qs.filter(cell_filter)
+
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, max_distance)
+        qs = qs.filter(latitude__gte=min_lat, latitude__lte=max_lat)
+        if -180.0 <= min_lon and max_lon <= 180.0:
+            qs = qs.filter(longitude__gte=min_lon, longitude__lte=max_lon)
+        return qs
+
+    def nearby(self, lat, lon, max_distance, limit=None):
+        """Devuelve [(id, distancia_km)] de los negocios a max_distance km o menos, del más cercano al más lejano."""
+        rows = list(self.nearby_candidates(lat, lon, max_distance).values_list('id', 'latitude', 'longitude'))
+        if not rows:
+            return []
+        ids, lats, lons = zip(*rows)
+        return score_nearby(ids, lats, lons, lat, lon, max_distance, limit=limit)
+
+    def adjust_rating(self, rating_delta, count_delta):
+        """Suma rating_delta/count_delta a los agregados de calificación en un solo UPDATE."""
+        new_sum = F('rating_sum') + rating_delta
+        new_count = F('review_count') + count_delta
+        return self.update(
+            rating_sum=new_sum,
+            review_count=new_count,
+            rating_avg=rating_average(rating_sum=new_sum, review_count=new_count),
+            discovery_score=discovery_score(rating_sum=new_sum, review_count=new_count),
+        )
+
+    def adjust_stars(self, stars_delta, count_delta):
+        """Suma stars_delta/count_delta a los agregados de calificaciones rápidas (Rating) en un solo UPDATE;
+        el promedio mostrado y la puntuación de descubrimiento cambian en el mismo UPDATE."""
+        new_sum = F('star_sum') + stars_delta
+        new_count = F('star_count') + count_delta
+        return self.update(
+            star_sum=new_sum,
+            star_count=new_count,
+            rating_avg=rating_average(star_sum=new_sum, star_count=new_count),
+            discovery_score=discovery_score(star_sum=new_sum, star_count=new_count),
+        )
+
+    def increment(self, field, amount):
+        """Suma amount a un contador (ver counters.py) y actualiza en el mismo UPDATE lo que depende de él."""
+        updates = {field: F(field) + amount}
+        if field == 'visit_count':
+            updates['discovery_score'] = discovery_score(visit_count=updates[field])
+        return self.update(**updates)
+
+    def refresh_discovery_score(self):
+        """Recalcula discovery_score desde sus entradas en un solo UPDATE (ver discovery.py)."""
+        return self.update(discovery_score=discovery_score())
+
+    def rebuild_rating_aggregates(self):
+        """Recalcula los agregados de reseñas (rating_sum/review_count/rating_avg) y de calificaciones
+        rápidas (star_sum/star_count) desde sus tablas (reconstrucción completa)."""
+        reviews = Review.objects.filter(business=OuterRef('pk')).order_by().values('business')
+        ratings = Rating.objects.filter(business=OuterRef('pk')).order_by().values('business')
+        with transaction.atomic():
+            updated = self.update(
+                rating_sum=Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), 0),
+                review_count=Coalesce(Subquery(reviews.annotate(total=Count('id')).values('total')), 0),
+                star_sum=Coalesce(Subquery(ratings.annotate(total=Sum('stars')).values('total')), 0),
+                star_count=Coalesce(Subquery(ratings.annotate(total=Count('id')).values('total')), 0),
+            )
+            self.update(
+                rating_avg=rating_average(),
+                discovery_score=discovery_score(),
+            )
+        return updated
+
+
 # Businesses
 class Business(models.Model):
     business_name = models.CharField(max_length=50)
@@ -25,15 +142,67 @@ class Business(models.Model):
     image_url = models.CharField(max_length=500, blank=True, null=True)
     menu_url = models.CharField(max_length=500, blank=True, null=True)
     visit_count = models.PositiveIntegerField(default=0)
+    # Agregados de reseñas, mantenidos por las señales de Review (ver signals.py)
     review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    # Promedio mostrado y ordenable: reseñas y calificaciones rápidas juntas (ver discovery.rating_average)
+    rating_avg = models.FloatField(default=0, db_index=True)
+    # Agregados de calificaciones rápidas, mantenidos por Rating.rate() (ver también signals.py)
+    star_count = models.PositiveIntegerField(default=0)
+    star_sum = models.PositiveIntegerField(default=0)
 
     # Ubicación geográfica (para filtrar por cercanía)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, help_text="Latitud del negocio (ej: 6.2442)")
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, help_text="Longitud del negocio (ej: -75.5812)")
-    
+    # Celda geohash derivada de latitude/longitude, indexada para el prefiltro de cercanía
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True, editable=False)
+    # Orden "joyas ocultas": calificación alta, pocas visitas y recencia (ver discovery.py)
+    discovery_score = models.FloatField(default=0, editable=False)
+
+    objects = BusinessQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Mismo orden que la paginación por cursor de sort=discovery
+            models.Index(F('discovery_score').desc(), 'id', name='business_discovery_idx'),
+        ]
+
     def __str__(self):
         return self.business_name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Ubicación y estado guardados: la caché de cercanía solo se invalida si cambian
+        instance._saved_location = tuple(instance.__dict__.get(f) for f in ('latitude', 'longitude', 'status'))
+        # Entradas de discovery_score guardadas: solo se recalcula si cambia alguna
+        instance._saved_discovery_inputs = instance._discovery_inputs()
+        return instance
+
+    def _discovery_inputs(self):
+        return tuple(self.__dict__.get(f) for f in sorted(DISCOVERY_INPUT_FIELDS))
+
+    def save(self, *args, **kwargs):
+        # Mantener el geohash sincronizado con las coordenadas
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        self._saved_location = (self.latitude, self.longitude, self.status)
+        # La puntuación se calcula en la BD (created_at solo existe tras el INSERT) y solo
+        # cuando cambia alguna de sus entradas: editar nombre, dirección, etc. no la toca
+        inputs = self._discovery_inputs()
+        if update_fields is not None and not DISCOVERY_INPUT_FIELDS & set(update_fields):
+            return
+        if adding or inputs != getattr(self, '_saved_discovery_inputs', None):
+            Business.objects.filter(pk=self.pk).refresh_discovery_score()
+            self._saved_discovery_inputs = inputs
+
     def calcular_distancia(self, user_lat, user_lon):
         """Calcula la distancia en km desde las coordenadas del usuario usando la fórmula de Haversine."""
         if not self.latitude or not self.longitude:
@@ -57,10 +226,25 @@ class Business(models.Model):
         
         return round(distancia, 2)
 
+    @property
+    def cover_image(self):
+        """Primera imagen del negocio (usa la precarga de for_cards() si existe)."""
+        if hasattr(self, 'prefetched_cover_images'):
+            return self.prefetched_cover_images[0] if self.prefetched_cover_images else None
+        return self.images.order_by('id').first()
+
+    @property
+    def latest_review(self):
+        """Reseña más reciente con su usuario (usa la precarga de for_cards() si existe)."""
+        if hasattr(self, 'prefetched_latest_reviews'):
+            return self.prefetched_latest_reviews[0] if self.prefetched_latest_reviews else None
+        return self.review_set.select_related('user').order_by('-date', '-id').first()
+
     def average_rating(self):
-        reviews = self.review_set.all()
-        if reviews.exists():
-            return round(sum(r.rating for r in reviews) / reviews.count(), 2)
+        """Promedio de reseñas y calificaciones rápidas juntas (None sin ninguna)."""
+        count = self.review_count + self.star_count
+        if count:
+            return round((self.rating_sum + self.star_sum) / count, 2)
         return None
 
     average_rating.short_description = 'Promedio de Calificación'
@@ -69,23 +253,104 @@ class BusinessImage(models.Model):
     business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name='images')
     image_url = models.CharField(max_length=500)  # Guarda URLs largas de imágenes
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['business', 'image_url'], name='unique_business_image_url'),
+        ]
+
     def __str__(self):
         return f"Imagen de {self.business.business_name}: {self.image_url}"
 
-    from django.core.validators import MinValueValidator, MaxValueValidator
+    @classmethod
+    def sync(cls, urls_by_business, prune=True):
+        """Deja a cada negocio exactamente con sus URLs: {business_id: [urls]} -> (añadidas, borradas).
+
+        Diferencia de conjuntos contra lo guardado, con un número fijo de consultas por
+        llamada; las inserciones ignoran conflictos con la restricción única, así que dos
+        cargas a la vez no pueden duplicar una imagen. Con prune=False solo se añaden.
+        """
+        stored = {business_id: {} for business_id in urls_by_business}
+        for image_id, business_id, url in (
+            cls.objects.filter(business_id__in=list(urls_by_business)).values_list('id', 'business_id', 'image_url')
+        ):
+            stored[business_id][url] = image_id
+
+        to_add, to_remove = [], []
+        for business_id, urls in urls_by_business.items():
+            wanted = dict.fromkeys(urls)
+            to_add.extend(cls(business_id=business_id, image_url=url) for url in wanted if url not in stored[business_id])
+            if prune:
+                to_remove.extend(image_id for url, image_id in stored[business_id].items() if url not in wanted)
+
+        cls.objects.bulk_create(to_add, batch_size=1000, ignore_conflicts=True)
+        if to_remove:
+            cls.objects.filter(id__in=to_remove).delete()
+        return len(to_add), len(to_remove)
+
+
+
+# Calificaciones rápidas (1-5 estrellas, una por usuario y negocio)
+class Rating(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    business = models.ForeignKey('Business', on_delete=models.CASCADE, related_name='ratings')
+    stars = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
+    # Valor anterior, escrito por el propio upsert de rate(): permite ajustar los agregados con un delta
+    previous_stars = models.PositiveSmallIntegerField(blank=True, null=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'business')
+
+    def __str__(self):
+        return f"{self.user} - {self.business} ({self.stars} estrellas)"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valores guardados, para que las señales ajusten los agregados con el delta correcto
+        instance._saved_stars = instance.__dict__.get('stars')
+        instance._saved_business_id = instance.__dict__.get('business_id')
+        return instance
 
-    class Rating(models.Model):
-        user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-        business = models.ForeignKey('Business', on_delete=models.CASCADE, related_name='ratings')
-        stars = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
-        created_at = models.DateTimeField(auto_now_add=True)
-        updated_at = models.DateTimeField(auto_now=True)
+    def save(self, *args, **kwargs):
+        # Guardado por el ORM (p. ej. el admin): la calificación y el ajuste de agregados se confirman juntos
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._saved_stars = self.stars
+        self._saved_business_id = self.business_id
 
-        class Meta:
-            unique_together = ('user', 'business')
+    @classmethod
+    def rate(cls, user_id, business_id, stars):
+        """Guarda la calificación de un usuario con un único INSERT ... ON CONFLICT DO UPDATE.
 
-        def __str__(self):
-            return f"{self.user} - {self.business} ({self.stars} estrellas)"
+        Si ya tenía esas mismas estrellas no se escribe nada. Si cambia, el mismo upsert
+        devuelve el valor anterior y los agregados del negocio se ajustan con el delta en
+        la misma transacción. Devuelve True si hubo cambio.
+        """
+        table = connection.ops.quote_name(cls._meta.db_table)
+        # Mismo formato que las filas escritas por el ORM (p. ej. UTC sin zona en SQLite)
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {table} (user_id, business_id, stars, created_at, updated_at) "
+                    f"VALUES (%s, %s, %s, %s, %s) "
+                    f"ON CONFLICT (user_id, business_id) DO UPDATE SET "
+                    f"previous_stars = {table}.stars, stars = excluded.stars, updated_at = excluded.updated_at "
+                    f"WHERE {table}.stars <> excluded.stars "
+                    f"RETURNING previous_stars",
+                    [user_id, business_id, stars, now, now],
+                )
+                row = cursor.fetchone()
+            if row is None:
+                return False  # Mismas estrellas: sin escritura
+            previous = row[0]
+            if previous is None:
+                Business.objects.filter(pk=business_id).adjust_stars(stars, 1)
+            else:
+                Business.objects.filter(pk=business_id).adjust_stars(stars - previous, 0)
+        return True
 
 # Favorites
 class Favorite(models.Model):
@@ -110,11 +375,40 @@ class Review(models.Model):
     updated_at = models.DateTimeField(auto_now=True)   
     reports = models.IntegerField(default=0)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valores guardados, para que las señales ajusten los agregados con el delta correcto
+        instance._saved_rating = instance.__dict__.get('rating')
+        instance._saved_business_id = instance.__dict__.get('business_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # La reseña y el ajuste de agregados del negocio se confirman juntos
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._saved_rating = self.rating
+        self._saved_business_id = self.business_id
 
     def __str__(self):
         return f"Review by {self.user} for {self.business}"
 
 
+# Vecinos más similares de cada negocio, precalculados por build_recommendations (ver recommendations.py)
+class BusinessSimilarity(models.Model):
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name='similarities')
+    similar = models.ForeignKey(Business, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['business', 'similar'], name='unique_business_similarity'),
+        ]
+
+    def __str__(self):
+        return f"{self.business_id} ~ {self.similar_id} ({self.score:.3f})"
+
+
 # Points
 class Point(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -123,8 +417,190 @@ class Point(models.Model):
     registration_date = models.DateTimeField(auto_now_add=True)
     movement_type = models.CharField(max_length=10)  # 'earn' o 'redeem'
 
+    def save(self, *args, **kwargs):
+        # El movimiento y el ajuste del saldo (PointBalance) se confirman juntos
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
      return f"{self.amount} points for {self.user}"
 
 
+class InsufficientPoints(Exception):
+    """El saldo no alcanza para el movimiento (no se permiten saldos negativos)."""
+
+
+# Saldo de puntos materializado por usuario, mantenido con cada movimiento de Point
+class PointBalance(models.Model):
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='point_balance')
+    total = models.IntegerField(default=0)
+    earned = models.PositiveIntegerField(default=0)
+    redeemed = models.PositiveIntegerField(default=0)  # en positivo; los movimientos 'redeem' son negativos
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.total} points for {self.user}"
+
+    @classmethod
+    def for_user(cls, user):
+        """Saldo del usuario (sin guardar, en cero, si aún no tiene movimientos)."""
+        balance = cls.objects.filter(user=user).first()
+        return balance or cls(user=user)
+
+    @staticmethod
+    def movement_deltas(amount, movement_type):
+        """Variación de (total, earned, redeemed) que produce un movimiento."""
+        amount = int(amount)
+        earned = amount if movement_type == 'earn' else 0
+        redeemed = -amount if movement_type == 'redeem' else 0
+        return amount, earned, redeemed
+
+    @classmethod
+    def apply(cls, user_id, amount, movement_type, create=True, allow_overdraft=False):
+        """Aplica un movimiento al saldo con un UPDATE atómico (crea la fila si no existe y create=True).
+
+        Un débito solo se aplica si hay saldo suficiente: la comprobación va en el
+        WHERE del propio UPDATE, así que dos débitos concurrentes no pueden dejar el
+        saldo en negativo. Si no alcanza se lanza InsufficientPoints.
+        """
+        total, earned, redeemed = cls.movement_deltas(amount, movement_type)
+        balances = cls.objects.filter(user_id=user_id)
+        if total < 0 and not allow_overdraft:
+            balances = balances.filter(total__gte=-total)
+        updated = balances.update(
+            total=F('total') + total,
+            earned=F('earned') + earned,
+            redeemed=F('redeemed') + redeemed,
+        )
+        if not updated and total < 0 and not allow_overdraft:
+            raise InsufficientPoints(f"Saldo insuficiente para debitar {-total} puntos")
+        if not updated and create:
+            try:
+                with transaction.atomic():
+                    cls.objects.create(user_id=user_id, total=total, earned=earned, redeemed=redeemed)
+            except IntegrityError:
+                # Otra petición creó la fila a la vez: se aplica sobre ella
+                cls.apply(user_id, amount, movement_type, create=create, allow_overdraft=allow_overdraft)
+
+    @classmethod
+    def redeem(cls, user, cost, description):
+        """Canjea cost puntos: comprueba y debita en una sola operación atómica.
+
+        Registra el movimiento 'redeem' y devuelve el nuevo saldo; si no alcanza,
+        lanza InsufficientPoints y no se guarda nada.
+        """
+        with transaction.atomic():
+            Point.objects.create(user=user, amount=-cost, description=description, movement_type='redeem')
+            return cls.objects.values_list('total', flat=True).get(user=user)
+
+    @classmethod
+    def rebuild(cls, user_ids=None):
+        """Recalcula los saldos desde el historial de Point; devuelve cuántos cambiaron."""
+        points = Point.objects.order_by()
+        balances = cls.objects.all()
+        if user_ids is not None:
+            points = points.filter(user_id__in=user_ids)
+            balances = balances.filter(user_id__in=user_ids)
+
+        expected = {
+            row['user_id']: (row['total'] or 0, row['earned'] or 0, -(row['redeemed'] or 0))
+            for row in points.values('user_id').annotate(
+                total=Sum('amount'),
+                earned=Sum('amount', filter=Q(movement_type='earn')),
+                redeemed=Sum('amount', filter=Q(movement_type='redeem')),
+            )
+        }
+        current = {b.user_id: (b.total, b.earned, b.redeemed) for b in balances}
+        for user_id in current.keys() - expected.keys():
+            expected[user_id] = (0, 0, 0)
+
+        changed = [
+            cls(user_id=user_id, total=total, earned=earned, redeemed=redeemed)
+            for user_id, (total, earned, redeemed) in expected.items()
+            if current.get(user_id) != (total, earned, redeemed)
+        ]
+        with transaction.atomic():
+            cls.objects.bulk_create(
+                changed, batch_size=1000, update_conflicts=True,
+                unique_fields=['user'], update_fields=['total', 'earned', 'redeemed', 'updated_at'],
+            )
+        return len(changed)
+
+
+
+# Respuestas de la IA ya obtenidas, por hash del prompt (ver enrichment.py)
+class CompletionCache(models.Model):
+    prompt_hash = models.CharField(max_length=64, unique=True)
+    model = models.CharField(max_length=50)
+    completion = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.model} {self.prompt_hash[:12]}"
+
+
+# Ejecuciones de los comandos de importación, con el punto de control para reanudarlas
+class ImportJob(models.Model):
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    command = models.CharField(max_length=50)
+    source = models.CharField(max_length=500)
+    source_signature = models.CharField(max_length=100)  # tamaño y fecha del archivo
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RUNNING)
+    rows_done = models.PositiveBigIntegerField(default=0)  # filas del CSV ya confirmadas
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['command', 'source', 'status'], name='importjob_lookup_idx')]
+
+    def __str__(self):
+        return f"{self.command} {self.source} ({self.status}, {self.rows_done} filas)"
+
+    @staticmethod
+    def signature(path):
+        stat = os.stat(path)
+        return f"{stat.st_size}:{int(stat.st_mtime)}"
+
+    @classmethod
+    def start(cls, command, source, resume=False):
+        """Nueva ejecución, o con resume=True la última sin terminar sobre el mismo archivo.
+
+        Si el archivo cambió desde entonces no se reanuda: las filas ya no coinciden.
+        """
+        signature = cls.signature(source)
+        if resume:
+            job = (
+                cls.objects.filter(command=command, source=source, source_signature=signature)
+                .exclude(status=cls.COMPLETED).order_by('-id').first()
+            )
+            if job:
+                job.status = cls.RUNNING
+                job.error = ''
+                job.save(update_fields=['status', 'error', 'updated_at'])
+                return job
+        return cls.objects.create(command=command, source=source, source_signature=signature)
+
+    def checkpoint(self, rows):
+        """Suma rows filas procesadas; llamar dentro de la transacción del lote."""
+        self.rows_done += rows
+        self.save(update_fields=['rows_done', 'updated_at'])
+
+    def finish(self):
+        self.status = self.COMPLETED
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'finished_at', 'updated_at'])
+
+    def fail(self, error):
+        self.status = self.FAILED
+        self.error = str(error)
+        self.save(update_fields=['status', 'error', 'updated_at'])
@@ -0,0 +1,161 @@
+"""Caché en memoria de candidatos para las búsquedas de cercanía.
+
+Usuarios a pocos metros entre sí piden casi lo mismo. La clave es la celda
+geohash del usuario (PRECISION, ~1,2 km x 0,6 km con 6) más la distancia
+redondeada hacia arriba a un escalón de DISTANCE_BUCKETS. Cada entrada guarda
+los negocios activos a menos de (escalón + semidiagonal de la celda) del centro
+de la celda, un superconjunto válido para cualquier punto de la celda; las
+distancias exactas se calculan después sobre esos candidatos, sin ir a la BD.
+
+Las entradas se desalojan por LRU (MAX_ENTRIES) y caducan a los TTL segundos.
+Al cambiar la ubicación o el estado de un negocio (señales de Business) se
+descartan las entradas cuya zona contiene su posición anterior o nueva; las
+cargas en bloque, que no disparan señales, la vacían con clear(). La caché
+es por proceso: los cambios hechos en otros procesos se ven al caducar.
+
+Configuración (settings.DELY_NEARBY_CACHE):
+    MAX_ENTRIES  entradas como máximo (por defecto 256)
+    PRECISION    precisión del geohash de la clave (por defecto 6)
+    TTL          segundos de vida de una entrada (por defecto 300)
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+from .geo import bounding_box, check_search_area, decode_cell, encode_geohash, haversine_km, score_nearby
+
+DEFAULTS = {
+    'MAX_ENTRIES': 256,
+    'PRECISION': 6,
+    'TTL': 300,
+}
+
+# Escalones de distancia (km); búsquedas más amplias no se cachean
+DISTANCE_BUCKETS = (1, 2, 5, 10, 20, 50)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'DELY_NEARBY_CACHE', {})}
+
+
+def distance_bucket(max_distance):
+    for bucket in DISTANCE_BUCKETS:
+        if max_distance <= bucket:
+            return bucket
+    return None
+
+
+class CandidateSet:
+    """Candidatos de una celda: ids y coordenadas como arrays, más la zona que cubren."""
+
+    def __init__(self, ids, lats, lons, box, expires_at):
+        self.ids = ids
+        self.lats = lats
+        self.lons = lons
+        self.box = box
+        self.expires_at = expires_at
+
+    def covers(self, lat, lon):
+        min_lat, max_lat, min_lon, max_lon = self.box
+        if not min_lat <= lat <= max_lat:
+            return False
+        # La caja puede salirse de [-180, 180] cerca del antimeridiano
+        return any(min_lon <= lon + shift <= max_lon for shift in (-360.0, 0.0, 360.0))
+
+
+class NearbyCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def nearby(self, lat, lon, max_distance, limit=None):
+        """[(id, distancia_km)] de los negocios activos a max_distance km o menos, como BusinessQuerySet.nearby()."""
+        from .models import Business
+
+        lat, lon, max_distance = check_search_area(lat, lon, max_distance)
+        bucket = distance_bucket(max_distance)
+        if bucket is None:
+            return Business.objects.filter(status=True).nearby(lat, lon, max_distance, limit=limit)
+
+        config = get_config()
+        key = (encode_geohash(lat, lon, config['PRECISION']), bucket)
+        entry = self._get(key)
+        if entry is None:
+            entry = self._load(key, config)
+        return score_nearby(entry.ids, entry.lats, entry.lons, lat, lon, max_distance, limit=limit)
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+    def _load(self, key, config):
+        from .models import Business
+
+        cell, bucket = key
+        min_lat, max_lat, min_lon, max_lon = decode_cell(cell)
+        center_lat, center_lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+        # Radio que cubre el círculo de búsqueda desde cualquier punto de la celda
+        half_diagonal = float(haversine_km(center_lat, center_lon, [max_lat], [max_lon])[0])
+        radius = bucket + half_diagonal
+
+        rows = list(
+            Business.objects.filter(status=True)
+            .nearby_candidates(center_lat, center_lon, radius)
+            .values_list('id', 'latitude', 'longitude')
+        )
+        ids, lats, lons = zip(*rows) if rows else ((), (), ())
+        entry = CandidateSet(
+            np.asarray(ids, dtype=np.int64),
+            np.asarray(lats, dtype=np.float64),
+            np.asarray(lons, dtype=np.float64),
+            bounding_box(center_lat, center_lon, radius),
+            time.monotonic() + config['TTL'],
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > config['MAX_ENTRIES']:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, *points):
+        """Descarta las entradas cuya zona contiene alguno de los puntos (lat, lon)."""
+        points = [(float(lat), float(lon)) for lat, lon in points if lat is not None and lon is not None]
+        if not points:
+            return 0
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if any(entry.covers(*p) for p in points)]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+nearby_cache = NearbyCache()
+
+
+def nearby(lat, lon, max_distance, limit=None):
+    return nearby_cache.nearby(lat, lon, max_distance, limit=limit)
+
+
+def invalidate(*points):
+    return nearby_cache.invalidate(*points)
+
+
+def clear():
+    nearby_cache.clear()
@@ -0,0 +1,166 @@
+"""Paginación por cursor (keyset): cada página cuesta lo mismo que la primera.
+
+En lugar de OFFSET + COUNT(*), el cursor guarda los valores de la clave de orden
+del último (o primer) elemento mostrado y la siguiente página se pide con un
+WHERE sobre esa clave, que el índice resuelve directamente.
+"""
+import base64
+import binascii
+import json
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, values):
+    """Serializa (dirección, valores de la clave) en un token apto para URL."""
+    payload = json.dumps([direction, [_to_json(v) for v in values]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, key_length):
+    """Devuelve (dirección, valores) o (None, None) si el cursor es inválido."""
+    if not cursor:
+        return None, None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError, binascii.Error):
+        return None, None
+    if direction not in (NEXT, PREVIOUS) or not isinstance(values, list) or len(values) != key_length:
+        return None, None
+    return direction, values
+
+
+def _to_json(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _parse_ordering(ordering):
+    return [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+
+def keyset_filter(ordering, values, reverse=False):
+    """Q que selecciona las filas posteriores (o anteriores con reverse) a values según ordering.
+
+    Para (a, -b, c) y valores (x, y, z) genera:
+    a > x OR (a = x AND b < y) OR (a = x AND b = y AND c > z)
+    """
+    condition = Q()
+    equal = Q()
+    for (field, descending), value in zip(_parse_ordering(ordering), values):
+        lookup = 'lt' if descending != reverse else 'gt'
+        condition |= equal & Q(**{f'{field}__{lookup}': value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+class KeysetPage:
+    """Página de resultados con los cursores para navegar a la anterior y a la siguiente."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginator:
+    """Paginador keyset para querysets.
+
+    ordering debe terminar en un campo único (normalmente id) para que el orden sea total.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+        self._fields = [field for field, _ in _parse_ordering(self.ordering)]
+
+    def _key(self, obj):
+        return [getattr(obj, field) for field in self._fields]
+
+    def get_page(self, cursor=None):
+        try:
+            return self._get_page(cursor)
+        except (ValueError, TypeError, ValidationError):
+            # Cursor manipulado o de otra ordenación: se vuelve a la primera página
+            return self._get_page(None)
+
+    def _get_page(self, cursor):
+        direction, values = decode_cursor(cursor, len(self.ordering))
+
+        if direction == PREVIOUS:
+            # Se recorre en orden inverso y se da la vuelta al resultado
+            reversed_ordering = [f[1:] if f.startswith('-') else '-' + f for f in self.ordering]
+            qs = self.queryset.filter(keyset_filter(self.ordering, values, reverse=True)).order_by(*reversed_ordering)
+            rows = list(qs[:self.per_page + 1])
+            more_before = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            previous_cursor = encode_cursor(PREVIOUS, self._key(rows[0])) if rows and more_before else None
+            next_cursor = encode_cursor(NEXT, self._key(rows[-1])) if rows else None
+            return KeysetPage(rows, next_cursor, previous_cursor)
+
+        qs = self.queryset.order_by(*self.ordering)
+        if direction == NEXT:
+            qs = qs.filter(keyset_filter(self.ordering, values))
+        rows = list(qs[:self.per_page + 1])
+        more_after = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        next_cursor = encode_cursor(NEXT, self._key(rows[-1])) if rows and more_after else None
+        previous_cursor = encode_cursor(PREVIOUS, self._key(rows[0])) if rows and direction == NEXT else None
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def paginate_ranked(ranked, per_page, cursor=None):
+    """Paginación keyset sobre una lista ya ordenada de (id, puntuación), p. ej. distancias.
+
+    Devuelve un KeysetPage cuyos elementos son las tuplas (id, puntuación) de la página.
+    """
+    direction, values = decode_cursor(cursor, 2)
+    try:
+        key = (float(values[1]), int(values[0])) if direction else None
+    except (ValueError, TypeError):
+        direction = None
+    keys = [(score, item_id) for item_id, score in ranked]
+    if direction == NEXT:
+        start = bisect_right(keys, key)
+        end = start + per_page
+    elif direction == PREVIOUS:
+        end = bisect_left(keys, key)
+        start = max(end - per_page, 0)
+    else:
+        start, end = 0, per_page
+    rows = ranked[start:end]
+    next_cursor = encode_cursor(NEXT, list(rows[-1])) if rows and end < len(ranked) else None
+    previous_cursor = encode_cursor(PREVIOUS, list(rows[0])) if rows and start > 0 else None
+    return KeysetPage(rows, next_cursor, previous_cursor)
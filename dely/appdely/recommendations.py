@@ -0,0 +1,127 @@
+"""Recomendaciones ítem-ítem a partir de reseñas y favoritos.
+
+El trabajo offline (comando build_recommendations) arma una matriz dispersa
+usuario x negocio: cada reseña aporta (rating - 3), de modo que 1-2 estrellas
+restan y 4-5 suman, y cada favorito suma FAVORITE_WEIGHT. La similitud entre dos
+negocios es el coseno de sus columnas, atenuado cuando pocos usuarios valoraron
+ambos (n / (n + SHRINKAGE)). Se calcula por bloques de columnas con productos de
+matrices dispersas y se guardan solo los TOP_K vecinos de cada negocio en
+BusinessSimilarity.
+
+recommend(user) lee esos vecinos para lo que el usuario valoró bien o marcó como
+favorito, sin recorrer reseñas de otros usuarios.
+"""
+import numpy as np
+from scipy import sparse
+
+from .models import BusinessSimilarity, Favorite, Review
+
+NEUTRAL_RATING = 3
+FAVORITE_WEIGHT = 2.0
+SHRINKAGE = 5.0
+TOP_K = 20
+
+# Semillas por usuario: sus interacciones positivas más recientes
+MAX_SEEDS = 50
+
+
+class InteractionMatrix:
+    """Matriz usuario x negocio (CSC) con los ids de negocio de cada columna."""
+
+    def __init__(self, matrix, business_ids):
+        self.matrix = matrix
+        self.business_ids = business_ids
+        # Patrón binario y columnas normalizadas para el coseno
+        self.binary = matrix.copy()
+        self.binary.data = np.ones_like(self.binary.data)
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+        inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        self.normalized = (matrix @ sparse.diags(inverse)).tocsc()
+
+    @classmethod
+    def build(cls):
+        reviews = np.array(Review.objects.values_list('user_id', 'business_id', 'rating'), dtype=np.int64).reshape(-1, 3)
+        favorites = np.array(Favorite.objects.values_list('user_id', 'business_id'), dtype=np.int64).reshape(-1, 2)
+
+        user_ids, users = np.unique(np.concatenate([reviews[:, 0], favorites[:, 0]]), return_inverse=True)
+        business_ids, businesses = np.unique(np.concatenate([reviews[:, 1], favorites[:, 1]]), return_inverse=True)
+        shape = (len(user_ids), len(business_ids))
+        n_reviews = len(reviews)
+
+        # Varias reseñas del mismo usuario al mismo negocio se promedian (coo suma duplicados)
+        review_users, review_businesses = users[:n_reviews], businesses[:n_reviews]
+        totals = sparse.coo_matrix((reviews[:, 2] - NEUTRAL_RATING, (review_users, review_businesses)), shape=shape, dtype=np.float64).tocsc()
+        counts = sparse.coo_matrix((np.ones(n_reviews), (review_users, review_businesses)), shape=shape).tocsc()
+        counts.data = 1.0 / counts.data
+        matrix = totals.multiply(counts).tocsc()
+
+        matrix = matrix + sparse.coo_matrix(
+            (np.full(len(favorites), FAVORITE_WEIGHT), (users[n_reviews:], businesses[n_reviews:])), shape=shape,
+        ).tocsc()
+        matrix.eliminate_zeros()
+        return cls(matrix.tocsc(), business_ids)
+
+    def columns(self, business_ids):
+        """Índices de columna de los negocios dados (los que no tienen interacciones se ignoran)."""
+        return np.flatnonzero(np.isin(self.business_ids, np.fromiter(business_ids, dtype=np.int64)))
+
+    def co_rated(self, columns):
+        """Columnas que comparten al menos un usuario con alguna de las dadas (incluidas ellas)."""
+        if not len(columns):
+            return columns
+        return np.unique((self.binary[:, columns].T @ self.binary).tocsr().indices)
+
+    def neighbours(self, columns, k=TOP_K):
+        """Para un bloque de columnas: [(business_id, [(similar_id, score)])] con los k más similares."""
+        similarity = (self.normalized[:, columns].T @ self.normalized).tocsr()
+        support = (self.binary[:, columns].T @ self.binary).tocsr()
+        support.data = support.data / (support.data + SHRINKAGE)
+        similarity = similarity.multiply(support).tocsr()
+
+        results = []
+        for row, column in enumerate(columns):
+            start, end = similarity.indptr[row], similarity.indptr[row + 1]
+            indices, scores = similarity.indices[start:end], similarity.data[start:end]
+            keep = (scores > 0) & (indices != column)
+            indices, scores = indices[keep], scores[keep]
+            if len(scores) > k:
+                # Se conservan también los empatados con el k-ésimo, para desempatar por id abajo
+                kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+                top = scores >= kth
+                indices, scores = indices[top], scores[top]
+            # De mayor a menor puntuación; a igualdad, el de menor id (las columnas van ordenadas por id)
+            order = np.lexsort((indices, -scores))[:k]
+            results.append((
+                int(self.business_ids[column]),
+                [(int(self.business_ids[i]), float(s)) for i, s in zip(indices[order], scores[order])],
+            ))
+        return results
+
+
+def recommend(user, limit=10):
+    """[(business_id, puntuación)] recomendados a user, de mayor a menor.
+
+    Suma la similitud de los vecinos precalculados de sus semillas (reseñas de 4-5
+    estrellas y favoritos), ponderada por cuánto le gustó cada semilla, y descarta
+    los negocios que ya reseñó o marcó como favorito.
+    """
+    seeds = {}
+    reviewed = Review.objects.filter(user=user).order_by('-updated_at').values_list('business_id', 'rating')
+    seen = set()
+    for business_id, rating in reviewed:
+        seen.add(business_id)
+        if rating > NEUTRAL_RATING and len(seeds) < MAX_SEEDS:
+            seeds.setdefault(business_id, float(rating - NEUTRAL_RATING))
+    for business_id in Favorite.objects.filter(user=user).order_by('-id').values_list('business_id', flat=True):
+        seen.add(business_id)
+        if business_id in seeds or len(seeds) < MAX_SEEDS:
+            seeds[business_id] = seeds.get(business_id, 0.0) + FAVORITE_WEIGHT
+    if not seeds:
+        return []
+
+    scores = {}
+    neighbours = BusinessSimilarity.objects.filter(business_id__in=list(seeds)).values_list('business_id', 'similar_id', 'score')
+    for business_id, similar_id, score in neighbours:
+        if similar_id not in seen:
+            scores[similar_id] = scores.get(similar_id, 0.0) + seeds[business_id] * score
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
@@ -0,0 +1,243 @@
+"""Índice invertido de búsqueda para negocios, promociones y noticias.
+
+Los textos se pliegan con normalize_name (minúsculas, sin tildes ni puntuación)
+tanto al indexar como al buscar. El almacenamiento depende del motor: FTS5 en
+SQLite y tsvector + GIN en PostgreSQL; se puede forzar otro con el setting
+DELY_SEARCH_BACKEND (ruta a una clase). Si el motor no tiene backend, search()
+devuelve None y las vistas usan el filtro icontains de siempre.
+
+El índice se actualiza con las señales post_save/post_delete de cada modelo
+registrado con register(); rebuild_search_index lo reconstruye completo.
+
+search() devuelve como mucho SEARCH_LIMIT resultados (los más relevantes): las
+consultas muy genéricas no llegan más allá de la página SEARCH_LIMIT / por_página.
+Los empates de puntuación se ordenan por id, igual que pagina paginate_ranked.
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import import_string
+
+from .utils import normalize_name
+
+INDEX_TABLE = 'appdely_search_index'
+SEARCH_LIMIT = 1000
+
+# Tipos de documento; el id del documento en el índice combina tipo e id del objeto
+KINDS = {'business': 1, 'promocion': 2, 'noticia': 3}
+KIND_SLOTS = 8
+
+# modelo -> (tipo, función que devuelve (título, cuerpo) o None si no debe indexarse)
+_registry = {}
+# modelo -> campos que usa su documento (un save(update_fields=...) sin ellos no reindexa)
+_indexed_fields = {}
+
+
+def document_id(kind, object_id):
+    return int(object_id) * KIND_SLOTS + KINDS[kind]
+
+
+def object_id(doc_id):
+    return int(doc_id) // KIND_SLOTS
+
+
+def query_terms(query):
+    """Términos plegados de la consulta (mismo plegado que los documentos)."""
+    return normalize_name(query).split()
+
+
+class SQLiteFTSBackend:
+    """Tabla virtual FTS5; el rowid es document_id() y la columna kind filtra por tipo."""
+
+    def create_schema(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} "
+            f"USING fts5(kind, title, body, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+    def drop_schema(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {INDEX_TABLE}")
+
+    def upsert(self, cursor, kind, docs):
+        self.delete(cursor, [doc_id for doc_id, _, _ in docs])
+        cursor.executemany(
+            f"INSERT INTO {INDEX_TABLE} (rowid, kind, title, body) VALUES (%s, %s, %s, %s)",
+            [(doc_id, kind, title, body) for doc_id, title, body in docs],
+        )
+
+    def delete(self, cursor, doc_ids):
+        cursor.executemany(f"DELETE FROM {INDEX_TABLE} WHERE rowid = %s", [(doc_id,) for doc_id in doc_ids])
+
+    def clear(self, cursor, kind):
+        cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s", [f'kind : {kind}'])
+
+    def search(self, cursor, kind, terms, limit):
+        # Todos los términos son obligatorios, admiten prefijo ("pizz" encuentra "pizzeria")
+        # y solo se buscan en el texto: la columna kind filtra, no se busca en ella
+        terms = ' AND '.join(f'"{term}"*' for term in terms)
+        match = f'kind : {kind} AND {{title body}} : ({terms})'
+        cursor.execute(
+            f"SELECT rowid, bm25({INDEX_TABLE}, 0.0, 10.0, 1.0) AS score FROM {INDEX_TABLE} "
+            f"WHERE {INDEX_TABLE} MATCH %s ORDER BY score, rowid LIMIT %s",
+            [match, limit],
+        )
+        return [(object_id(row[0]), row[1]) for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend:
+    """Tabla con columna tsvector (título con peso A, cuerpo con peso B) e índice GIN."""
+
+    def create_schema(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {INDEX_TABLE} ("
+            f"id bigint PRIMARY KEY, kind varchar(20) NOT NULL, document tsvector NOT NULL)"
+        )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_document ON {INDEX_TABLE} USING gin (document)")
+
+    def drop_schema(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {INDEX_TABLE}")
+
+    def upsert(self, cursor, kind, docs):
+        cursor.executemany(
+            f"INSERT INTO {INDEX_TABLE} (id, kind, document) VALUES (%s, %s, "
+            f"setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B')) "
+            f"ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document",
+            [(doc_id, kind, title, body) for doc_id, title, body in docs],
+        )
+
+    def delete(self, cursor, doc_ids):
+        cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE id = ANY(%s)", [list(doc_ids)])
+
+    def clear(self, cursor, kind):
+        cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE kind = %s", [kind])
+
+    def search(self, cursor, kind, terms, limit):
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        cursor.execute(
+            f"SELECT id, -ts_rank(document, query) AS score FROM {INDEX_TABLE}, to_tsquery('simple', %s) query "
+            f"WHERE kind = %s AND document @@ query ORDER BY score, id LIMIT %s",
+            [tsquery, kind, limit],
+        )
+        return [(object_id(row[0]), row[1]) for row in cursor.fetchall()]
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend(conn=None):
+    """Backend para la conexión dada, o None si el motor no tiene índice de texto completo."""
+    path = getattr(settings, 'DELY_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    backend_class = BACKENDS.get((conn or connection).vendor)
+    return backend_class() if backend_class else None
+
+
+def register(model, kind, document, fields):
+    """Indexa las instancias de model como documentos kind; document(obj) -> (título, cuerpo) o None."""
+    _registry[model] = (kind, document)
+    _indexed_fields[model] = frozenset(fields)
+    post_save.connect(_instance_saved, sender=model, dispatch_uid=f'search-index-save-{kind}')
+    post_delete.connect(_instance_deleted, sender=model, dispatch_uid=f'search-index-delete-{kind}')
+
+
+def registered_models():
+    """[(modelo, tipo)] de los modelos registrados en el índice."""
+    return [(model, kind) for model, (kind, _) in _registry.items()]
+
+
+def _instance_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not _indexed_fields[sender] & set(update_fields):
+        return
+    index_objects(sender, [instance])
+
+
+def _instance_deleted(sender, instance, **kwargs):
+    backend = get_backend()
+    if backend is None:
+        return
+    kind, _ = _registry[sender]
+    with connection.cursor() as cursor:
+        backend.delete(cursor, [document_id(kind, instance.pk)])
+
+
+def index_objects(model, objects, kind=None, document=None, backend=None, conn=None):
+    """Actualiza (o retira) del índice los objetos dados; pensado también para cargas masivas."""
+    backend = backend or get_backend(conn)
+    if backend is None:
+        return
+    if kind is None:
+        kind, document = _registry[model]
+    docs, removed = [], []
+    for obj in objects:
+        doc = document(obj)
+        if doc is None:
+            removed.append(document_id(kind, obj.pk))
+        else:
+            title, body = doc
+            docs.append((document_id(kind, obj.pk), normalize_name(title), normalize_name(body)))
+    # Una sentencia por lote (executemany) en vez de una o dos por objeto
+    with (conn or connection).cursor() as cursor:
+        if removed:
+            backend.delete(cursor, removed)
+        if docs:
+            backend.upsert(cursor, kind, docs)
+
+
+def rebuild(model, batch_size=1000):
+    """Reconstruye desde cero los documentos de un modelo registrado."""
+    backend = get_backend()
+    if backend is None:
+        return 0
+    kind, document = _registry[model]
+    with connection.cursor() as cursor:
+        backend.clear(cursor, kind)
+    count = 0
+    batch = []
+    for obj in model._default_manager.order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            index_objects(model, batch, backend=backend)
+            count += len(batch)
+            batch = []
+    index_objects(model, batch, backend=backend)
+    return count + len(batch)
+
+
+def search(kind, query, limit=SEARCH_LIMIT):
+    """[(id, puntuación)] ordenado del más relevante al menos (menor puntuación primero, luego id).
+
+    Como mucho limit resultados: lo que quede por debajo de los limit más relevantes no se devuelve.
+
+    Devuelve None si no hay backend de texto completo para la base de datos actual.
+    """
+    backend = get_backend()
+    if backend is None:
+        return None
+    terms = query_terms(query)
+    if not terms:
+        return []
+    with connection.cursor() as cursor:
+        return backend.search(cursor, kind, terms, limit)
+
+
+# Documentos de cada tipo (también se usan desde las migraciones con modelos históricos)
+def business_document(business):
+    if not business.status:
+        return None
+    return business.business_name, f"{business.description} {business.address}"
+
+
+def promocion_document(promocion):
+    if not promocion.activa:
+        return None
+    return promocion.titulo, f"{promocion.descripcion_corta} {promocion.descripcion}"
+
+
+def noticia_document(noticia):
+    if not noticia.activa:
+        return None
+    return noticia.titulo, f"{noticia.subtitulo} {noticia.resumen} {noticia.contenido}"
@@ -0,0 +1,122 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache, favorites, nearby_cache, search
+from .models import Business, BusinessImage, Favorite, Point, PointBalance, Rating, Review
+
+
+# Agregados de calificación: se ajustan con deltas, sin volver a leer las reseñas
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    rating = int(instance.rating)
+    if created:
+        Business.objects.filter(pk=instance.business_id).adjust_rating(rating, 1)
+        return
+
+    old_rating = getattr(instance, '_saved_rating', None)
+    old_business_id = getattr(instance, '_saved_business_id', None)
+    if old_rating is None or old_business_id is None:
+        # Instancia que no viene de la BD: no se conoce el valor previo
+        Business.objects.filter(pk=instance.business_id).rebuild_rating_aggregates()
+        return
+    if old_business_id != instance.business_id:
+        Business.objects.filter(pk=old_business_id).adjust_rating(-int(old_rating), -1)
+        Business.objects.filter(pk=instance.business_id).adjust_rating(rating, 1)
+    elif int(old_rating) != rating:
+        Business.objects.filter(pk=instance.business_id).adjust_rating(rating - int(old_rating), 0)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    rating = getattr(instance, '_saved_rating', None)
+    if rating is None:
+        rating = instance.rating
+    business_id = getattr(instance, '_saved_business_id', None) or instance.business_id
+    Business.objects.filter(pk=business_id).adjust_rating(-int(rating), -1)
+
+
+# Calificaciones rápidas: Rating.rate() es SQL directo (no dispara señales) y ajusta los
+# agregados en su propia transacción; aquí los guardados y borrados hechos con el ORM
+# (admin, borrados en cascada al borrar el usuario)
+@receiver(post_save, sender=Rating)
+def rating_saved(sender, instance, created, **kwargs):
+    stars = int(instance.stars)
+    if created:
+        Business.objects.filter(pk=instance.business_id).adjust_stars(stars, 1)
+        return
+
+    old_stars = getattr(instance, '_saved_stars', None)
+    old_business_id = getattr(instance, '_saved_business_id', None)
+    if old_stars is None or old_business_id is None:
+        # Instancia que no viene de la BD: no se conoce el valor previo
+        Business.objects.filter(pk=instance.business_id).rebuild_rating_aggregates()
+        return
+    if old_business_id != instance.business_id:
+        Business.objects.filter(pk=old_business_id).adjust_stars(-int(old_stars), -1)
+        Business.objects.filter(pk=instance.business_id).adjust_stars(stars, 1)
+    elif int(old_stars) != stars:
+        Business.objects.filter(pk=instance.business_id).adjust_stars(stars - int(old_stars), 0)
+
+
+@receiver(post_delete, sender=Rating)
+def rating_deleted(sender, instance, **kwargs):
+    stars = getattr(instance, '_saved_stars', None)
+    if stars is None:
+        stars = instance.stars
+    business_id = getattr(instance, '_saved_business_id', None) or instance.business_id
+    Business.objects.filter(pk=business_id).adjust_stars(-int(stars), -1)
+
+
+# Caché de cercanía: solo se invalida si cambian la ubicación o el estado del negocio
+@receiver(post_save, sender=Business)
+def business_location_saved(sender, instance, created, **kwargs):
+    old = getattr(instance, '_saved_location', None)
+    new = (instance.latitude, instance.longitude, instance.status)
+    if not created and old == new:
+        return
+    points = [new[:2]] + ([old[:2]] if old else [])
+    transaction.on_commit(lambda: nearby_cache.invalidate(*points))
+
+
+@receiver(post_delete, sender=Business)
+def business_location_deleted(sender, instance, **kwargs):
+    old = getattr(instance, '_saved_location', None) or (instance.latitude, instance.longitude)
+    transaction.on_commit(lambda: nearby_cache.invalidate(old[:2]))
+
+
+# Conjunto de favoritos en caché: set_favorite() invalida por su cuenta (bulk_create
+# no dispara señales); esto cubre el admin y los borrados en cascada
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def favorite_changed(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: favorites.invalidate(user_id))
+
+
+# Saldo de puntos: cada movimiento ajusta PointBalance en la misma transacción;
+# un débito sin saldo suficiente lanza InsufficientPoints y revierte el movimiento
+@receiver(post_save, sender=Point)
+def point_saved(sender, instance, created, **kwargs):
+    if created:
+        PointBalance.apply(instance.user_id, instance.amount, instance.movement_type)
+    else:
+        # Edición de un movimiento existente: se recalcula el saldo de ese usuario
+        PointBalance.rebuild(user_ids=[instance.user_id])
+
+
+@receiver(post_delete, sender=Point)
+def point_deleted(sender, instance, **kwargs):
+    # Sin crear la fila: si el usuario se está borrando, su saldo también desaparece
+    PointBalance.apply(instance.user_id, -int(instance.amount), instance.movement_type,
+                       create=False, allow_overdraft=True)
+
+
+# Índice de búsqueda: se actualiza en cada guardado/borrado
+search.register(Business, 'business', search.business_document,
+                fields=['business_name', 'description', 'address', 'status'])
+
+# Caché de páginas: las tarjetas de negocio muestran datos, portada y última reseña
+cache.invalidate_on(Business, 'business')
+cache.invalidate_on(BusinessImage, 'business')
+cache.invalidate_on(Review, 'business')
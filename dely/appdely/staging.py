@@ -0,0 +1,78 @@
+"""Tabla temporal en disco para cruzar CSVs grandes sin cargarlos en memoria.
+
+Los comandos de carga leen el CSV de imágenes fila a fila y lo vuelcan en una base
+SQLite temporal (sqlite3 de la biblioteca estándar, independiente de la BD de
+Django) con un índice por nombre normalizado. Después cada lote de negocios
+consulta solo las imágenes de sus nombres (lookup), o se recorren agrupadas por
+negocio (groups), así que la memoria usada no depende del tamaño del archivo.
+"""
+import csv
+import os
+import sqlite3
+import tempfile
+from itertools import groupby, islice
+
+from .utils import normalize_name
+
+INSERT_BATCH = 10000
+# Límite de parámetros por consulta de SQLite en versiones antiguas
+LOOKUP_BATCH = 900
+
+
+class ImageStaging:
+    """Imágenes del CSV indexadas por nombre normalizado; usar como context manager."""
+
+    def __init__(self, directory=None):
+        fd, self.path = tempfile.mkstemp(prefix='dely-images-', suffix='.sqlite3', dir=directory)
+        os.close(fd)
+        self.db = sqlite3.connect(self.path)
+        # Es un archivo desechable: sin diario ni fsync
+        self.db.execute("PRAGMA journal_mode = OFF")
+        self.db.execute("PRAGMA synchronous = OFF")
+        self.db.execute("CREATE TABLE images (name TEXT NOT NULL, norm_name TEXT NOT NULL, url TEXT NOT NULL)")
+        self.restaurants = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.db.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def load(self, csv_path, name_column='Business_Nombre', url_column='Imagen_URL'):
+        """Vuelca el CSV por lotes y crea el índice al final (más rápido que mantenerlo fila a fila)."""
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            rows = (
+                (name := (row.get(name_column) or '').strip(), normalize_name(name), url.strip())
+                for row in csv.DictReader(f)
+                if (url := row.get(url_column, '')) and url.strip()
+            )
+            while batch := list(islice(rows, INSERT_BATCH)):
+                self.db.executemany("INSERT INTO images (name, norm_name, url) VALUES (?, ?, ?)", batch)
+        self.db.execute("CREATE INDEX images_norm_name ON images (norm_name)")
+        self.db.execute("CREATE INDEX images_name ON images (name)")
+        self.db.commit()
+        self.restaurants = self.db.execute("SELECT COUNT(DISTINCT norm_name) FROM images").fetchone()[0]
+
+    def lookup(self, norm_names):
+        """{nombre normalizado: [urls en el orden del archivo]} para los nombres dados."""
+        found = {}
+        norm_names = list(set(norm_names))
+        for start in range(0, len(norm_names), LOOKUP_BATCH):
+            chunk = norm_names[start:start + LOOKUP_BATCH]
+            placeholders = ', '.join('?' * len(chunk))
+            for norm_name, url in self.db.execute(
+                f"SELECT norm_name, url FROM images WHERE norm_name IN ({placeholders}) ORDER BY rowid", chunk
+            ):
+                found.setdefault(norm_name, []).append(url)
+        return found
+
+    def groups(self):
+        """(nombre, [urls sin repetir]) por cada nombre del CSV, en orden alfabético."""
+        rows = self.db.execute("SELECT name, url FROM images WHERE name != '' ORDER BY name, rowid")
+        for name, group in groupby(rows, key=lambda row: row[0]):
+            yield name, list(dict.fromkeys(url for _, url in group))
@@ -21,6 +21,7 @@ document.addEventListener('DOMContentLoaded', function() {
             // Usar ubicación guardada
             const location = JSON.parse(storedLocation);
             updateUI(location);
+            fetchNearbyBusinesses(location);
         }
     }
 });
@@ -142,27 +143,53 @@ function updateUI(location) {
 }
 
 function fetchNearbyBusinesses(location) {
-    // Enviar ubicación al servidor para filtrar negocios cercanos
-    fetch('/api/nearby-businesses/', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-            'X-CSRFToken': getCookie('csrftoken')
-        },
-        body: JSON.stringify({
-            latitude: location.latitude,
-            longitude: location.longitude
-        })
-    })
+    // GET con coordenadas redondeadas (~110 m): la respuesta se puede cachear en el
+    // navegador y la revalidación con ETag evita descargarla de nuevo si no cambió
+    const params = new URLSearchParams({
+        lat: location.latitude.toFixed(3),
+        lon: location.longitude.toFixed(3),
+        distance: 5,
+        limit: 10
+    });
+    fetch(`/api/nearby-businesses/?${params}`)
     .then(response => response.json())
-    .then(data => {
-        console.log('Negocios cercanos:', data);
-        // Aquí podría actualizar la UI con los negocios cercanos
-        // (Lo haremos en la vista Django)
-    })
+    .then(data => renderNearbyBusinesses(data.results || []))
     .catch(error => console.log('Error:', error));
 }
 
+// Pinta la lista compacta de cercanos en la sidebar, sin volver a cargar la página
+function renderNearbyBusinesses(results) {
+    let container = document.getElementById('nearby-businesses');
+    if (!container) {
+        const aside = document.querySelector('aside.col-md-3');
+        if (!aside) {
+            return;
+        }
+        container = document.createElement('div');
+        container.id = 'nearby-businesses';
+        container.className = 'bg-white rounded shadow-sm p-3 mb-4';
+        aside.appendChild(container);
+    }
+
+    const escape = text => String(text).replace(/[&<>"']/g, c => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[c]);
+    const items = results.map(b => `
+        <a href="${escape(b.url)}" class="d-flex align-items-center gap-2 mb-2 text-decoration-none text-dark">
+            ${b.image ? `<img src="${escape(b.image)}" alt="" style="width: 40px; height: 40px; object-fit: cover; border-radius: 8px;">` : ''}
+            <div style="font-size: 0.85rem;">
+                <strong class="d-block">${escape(b.name)}</strong>
+                <small class="text-muted">${b.distance_km} km · ★ ${b.rating} (${b.reviews})</small>
+            </div>
+        </a>
+    `).join('');
+
+    container.innerHTML = `
+        <strong class="text-danger d-block mb-2"><i class="fas fa-location-arrow me-1"></i>Cerca de ti</strong>
+        ${items || '<small class="text-muted">No hay negocios a menos de 5 km.</small>'}
+    `;
+}
+
 // Helper para obtener CSRF token
 function getCookie(name) {
     let cookieValue = null;
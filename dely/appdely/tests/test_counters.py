@@ -0,0 +1,41 @@
+"""Contadores con escritura diferida: el volcado por MAX_PENDING ocurre en el hilo de fondo."""
+import threading
+import time
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+
+from appdely.counters import CounterBuffer
+from appdely.models import Business, BusinessType
+
+
+@override_settings(DELY_COUNTERS={'FLUSH_INTERVAL': 3600, 'MAX_PENDING': 2, 'DURABILITY': 'buffered'})
+class CounterBufferTests(TransactionTestCase):
+    def setUp(self):
+        business_type = BusinessType.objects.create(description='Restaurante')
+        self.businesses = [
+            Business.objects.create(business_name=f'Negocio {i}', address='Calle 1', description='d',
+                                    phone_number='1', email='n@dely.co', business_type=business_type)
+            for i in range(2)
+        ]
+
+    def test_max_pending_wakes_the_flusher(self):
+        buffer = CounterBuffer()
+        flush_threads = []
+        original = buffer.flush
+
+        def flush():
+            flush_threads.append(threading.current_thread().name)
+            return original()
+
+        with mock.patch.object(buffer, 'flush', side_effect=flush):
+            for business in self.businesses:
+                buffer.increment(Business, business.pk, 'visit_count')
+            # La petición no vuelca: el hilo de fondo despierta antes del intervalo
+            deadline = time.monotonic() + 5
+            while Business.objects.filter(visit_count=1).count() < len(self.businesses):
+                self.assertLess(time.monotonic(), deadline, "el hilo de volcado no despertó")
+                time.sleep(0.01)
+
+        self.assertEqual(flush_threads, ['dely-counters'])
+        self.assertEqual(buffer.pending(Business, self.businesses[0].pk, 'visit_count'), 0)
@@ -0,0 +1,210 @@
+"""Generación de descripciones contra un servidor de completions local (compatible con OpenAI)."""
+import csv
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from appdely.enrichment import CompletionPool, TokenBucket
+from appdely.models import Business, CompletionCache, ImportJob
+
+
+class FakeCompletionServer:
+    """Servidor HTTP en un hilo que responde /v1/chat/completions como la API de OpenAI.
+
+    Devuelve "Reescrita: <prompt>", tarda delay segundos por petición y responde 400
+    a los prompts que contienen alguno de los textos de fail_on.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.fail_on = set()
+        self.prompts = []
+        self.times = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                prompt = body['messages'][-1]['content']
+                with server.lock:
+                    server.prompts.append(prompt)
+                    server.times.append(time.monotonic())
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    time.sleep(server.delay)
+                    if any(text in prompt for text in server.fail_on):
+                        self._send(400, {'error': {'message': 'prompt rechazado', 'type': 'invalid_request_error'}})
+                    else:
+                        self._send(200, {
+                            'id': 'chatcmpl-local', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+                            'choices': [{'index': 0, 'finish_reason': 'stop',
+                                         'message': {'role': 'assistant', 'content': f'Reescrita: {prompt}'}}],
+                            'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2},
+                        })
+                finally:
+                    with server.lock:
+                        server.in_flight -= 1
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f'http://127.0.0.1:{self.httpd.server_address[1]}/v1'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def openai_completion(base_url, model='modelo-local'):
+    """complete(prompt) con el cliente real de OpenAI apuntando al servidor local."""
+    from openai import OpenAI
+
+    client = OpenAI(api_key='local', base_url=base_url, max_retries=0)
+
+    def complete(prompt):
+        response = client.chat.completions.create(model=model, messages=[{'role': 'user', 'content': prompt}])
+        return response.choices[0].message.content
+
+    return complete
+
+
+class TokenBucketTests(TestCase):
+    def test_limits_rate_after_burst(self):
+        bucket = TokenBucket(rate=20, capacity=2)
+        start = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        # 2 fichas de ráfaga y 4 a 20 por segundo
+        self.assertGreaterEqual(time.monotonic() - start, 4 / 20 - 0.01)
+
+
+class CompletionPoolTests(TestCase):
+    def test_concurrency_limit(self):
+        with FakeCompletionServer(delay=0.2) as server:
+            with CompletionPool(openai_completion(server.base_url), 'modelo-local', concurrency=3, rate=1000) as pool:
+                results = pool.map([f'prompt {i}' for i in range(9)])
+        self.assertEqual(results['prompt 4'], 'Reescrita: prompt 4')
+        self.assertEqual(len(server.prompts), 9)
+        self.assertLessEqual(server.max_in_flight, 3)
+        self.assertGreater(server.max_in_flight, 1)
+
+    def test_rate_limit(self):
+        with FakeCompletionServer() as server:
+            with CompletionPool(openai_completion(server.base_url), 'modelo-local', concurrency=4, rate=10, burst=2) as pool:
+                pool.map([f'prompt {i}' for i in range(6)])
+        # 2 de ráfaga y 4 más a 10 por segundo
+        self.assertGreaterEqual(max(server.times) - min(server.times), 0.4 - 0.05)
+
+    def test_cache_hits_are_not_requested(self):
+        prompts = [f'prompt {i}' for i in range(5)]
+        with FakeCompletionServer() as server:
+            with CompletionPool(openai_completion(server.base_url), 'modelo-local', rate=1000) as pool:
+                first = pool.map(prompts)
+                second = pool.map(prompts + ['prompt nuevo'])
+        self.assertEqual(len(server.prompts), 6)
+        self.assertEqual(pool.cached, 5)
+        self.assertEqual(second['prompt 3'], first['prompt 3'])
+        self.assertEqual(CompletionCache.objects.count(), 6)
+
+    def test_errors_are_returned_not_cached(self):
+        with FakeCompletionServer() as server:
+            server.fail_on.add('malo')
+            with CompletionPool(openai_completion(server.base_url), 'modelo-local', rate=1000) as pool:
+                results = pool.map(['bueno', 'malo'])
+        self.assertIsInstance(results['malo'], Exception)
+        self.assertEqual(results['bueno'], 'Reescrita: bueno')
+        self.assertEqual(CompletionCache.objects.count(), 1)
+
+
+class UpdateDescriptionsCommandTests(TestCase):
+    FIELDS = ['business_name', 'address', 'description', 'phone_number', 'email', 'status', 'business_type']
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.write_csv([
+            [f'Negocio {i}', f'Calle {i}', f'Descripción {i}', '123', f'n{i}@dely.co', 'True', 'Restaurante']
+            for i in range(7)
+        ])
+
+    def write_csv(self, rows):
+        with open(Path(self.tmp.name) / 'descripcion_restaurantes.csv', 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.FIELDS)
+            writer.writerows(rows)
+
+    def run_command(self, server, *args):
+        out, err = StringIO(), StringIO()
+        with override_settings(BASE_DIR=Path(self.tmp.name)):
+            call_command('update_descriptions', '--ai', '--base-url', server.base_url, '--rate', '1000',
+                         '--chunk-size', '3', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_descriptions_from_fake_server(self):
+        with FakeCompletionServer() as server:
+            self.run_command(server)
+        self.assertEqual(len(server.prompts), 7)
+        self.assertEqual(Business.objects.count(), 7)
+        self.assertTrue(Business.objects.get(business_name='Negocio 2').description.startswith('Reescrita: '))
+
+    def test_rerun_uses_cache_and_skips_unchanged_rows(self):
+        with FakeCompletionServer() as server:
+            self.run_command(server)
+            out, _ = self.run_command(server)
+        self.assertEqual(len(server.prompts), 7)
+        self.assertIn('sin cambios: 7', out)
+        self.assertIn('0 peticiones a la API, 7 respuestas en caché', out)
+
+    def test_without_ai_flag_uses_csv_descriptions(self):
+        with override_settings(BASE_DIR=Path(self.tmp.name)):
+            call_command('update_descriptions', stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Business.objects.get(business_name='Negocio 1').description, 'Descripción 1')
+        self.assertFalse(CompletionCache.objects.exists())
+
+    def test_failed_rows_are_retried_on_resume(self):
+        with FakeCompletionServer() as server:
+            server.fail_on.add("Nombre del negocio: 'Negocio 4'")
+            _, err = self.run_command(server)
+            job = ImportJob.objects.get(command='update_descriptions')
+            # El lote 3-5 falla en la fila 4: el punto de control se queda ahí aunque el lote 6 se procese
+            self.assertEqual(job.status, ImportJob.FAILED)
+            self.assertEqual(job.rows_done, 4)
+            self.assertIn('--resume desde la fila 4', err)
+            self.assertFalse(Business.objects.filter(business_name='Negocio 4').exists())
+            self.assertTrue(Business.objects.filter(business_name='Negocio 6').exists())
+
+            server.fail_on.clear()
+            out, _ = self.run_command(server, '--resume')
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.COMPLETED)
+        self.assertEqual(job.rows_done, 7)
+        self.assertIn('Creados: 1', out)
+        self.assertIn('sin cambios: 2', out)
+        # Solo se volvió a pedir el prompt que había fallado
+        self.assertEqual(sum("'Negocio 4'" in prompt for prompt in server.prompts), 2)
+        self.assertEqual(len(server.prompts), 8)
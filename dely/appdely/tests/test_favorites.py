@@ -0,0 +1,77 @@
+"""Favoritos: conjunto en caché, API de alternar y corazones del listado."""
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from appdely import favorites
+from appdely.models import Business, BusinessType, Favorite
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class FavoriteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        business_type = BusinessType.objects.create(description='Restaurante')
+        self.businesses = [
+            Business.objects.create(business_name=f'Negocio {i}', address='Calle 1', description='d',
+                                    phone_number='1', email='n@dely.co', business_type=business_type)
+            for i in range(3)
+        ]
+        self.user = get_user_model().objects.create(username='fan')
+
+    def toggle(self, **data):
+        return self.client.post('/api/favorites/toggle/', json.dumps(data), content_type='application/json')
+
+    def test_toggle_and_explicit_state(self):
+        self.client.force_login(self.user)
+        business_id = self.businesses[0].pk
+        self.assertEqual(self.toggle(business_id=business_id).json(), {'success': True, 'favorite': True})
+        self.assertEqual(self.toggle(business_id=business_id, favorite=True).json()['favorite'], True)
+        self.assertEqual(Favorite.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(self.toggle(business_id=business_id).json()['favorite'], False)
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_errors(self):
+        self.assertEqual(self.toggle(business_id=self.businesses[0].pk).status_code, 401)
+        self.client.force_login(self.user)
+        self.assertEqual(self.toggle(business_id='x').status_code, 400)
+        self.assertEqual(self.toggle(business_id=self.businesses[0].pk, favorite='si').status_code, 400)
+        self.assertEqual(self.client.get('/api/favorites/toggle/').status_code, 405)
+
+    def test_favorite_set_is_cached_and_invalidated(self):
+        self.assertEqual(favorites.favorite_ids(self.user), frozenset())
+        with CaptureQueriesContext(connection) as queries:
+            favorites.favorite_ids(self.user)
+        self.assertEqual(len(queries), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            favorites.set_favorite(self.user.pk, self.businesses[1].pk, True)
+        self.assertEqual(favorites.favorite_ids(self.user), {self.businesses[1].pk})
+        # Cambios por el ORM (admin) también invalidan
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.filter(user=self.user).get().delete()
+        self.assertEqual(favorites.favorite_ids(self.user), frozenset())
+
+    def test_list_hearts(self):
+        Favorite.objects.create(user=self.user, business=self.businesses[2])
+        self.client.force_login(self.user)
+        content = self.client.get('/').content.decode()
+        self.assertEqual(content.count('fa-solid fa-heart'), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.toggle(business_id=self.businesses[0].pk)
+        # La página cacheada del usuario se invalida
+        self.assertEqual(self.client.get('/').content.decode().count('fa-solid fa-heart'), 2)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class MissingBusinessTests(TransactionTestCase):
+    def test_unknown_business_is_404(self):
+        # La clave foránea se comprueba al confirmar: hace falta una transacción real
+        self.client.force_login(get_user_model().objects.create(username='fan'))
+        response = self.client.post('/api/favorites/toggle/', json.dumps({'business_id': 10 ** 6}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Favorite.objects.exists())
@@ -0,0 +1,63 @@
+"""API y listado de negocios cercanos."""
+import csv
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from appdely import nearby_cache
+from appdely.models import Business, BusinessType
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class NearbyApiTests(TestCase):
+    def setUp(self):
+        nearby_cache.clear()
+        business_type = BusinessType.objects.create(description='Restaurante')
+        self.business = Business.objects.create(
+            business_name='Cerca', address='Calle 1', description='d', phone_number='1', email='c@dely.co',
+            business_type=business_type, latitude=6.2442, longitude=-75.5812,
+        )
+
+    def test_nearby_results(self):
+        response = self.client.get('/api/nearby-businesses/', {'lat': 6.2442, 'lon': -75.5812, 'distance': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['id'] for r in response.json()['results']], [self.business.id])
+
+    def test_bulk_load_clears_cached_candidates(self):
+        Business.objects.filter(pk=self.business.pk).update(status=False)
+        params = {'lat': 6.2442, 'lon': -75.5812, 'distance': 1}
+        self.assertEqual(self.client.get('/api/nearby-businesses/', params).json()['results'], [])
+
+        # El upsert en bloque reactiva el negocio sin disparar señales
+        with tempfile.TemporaryDirectory() as base_dir:
+            with open(f'{base_dir}/descripcion_restaurantes.csv', 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=['business_name', 'address', 'description', 'phone_number',
+                                                       'email', 'status', 'business_type'])
+                writer.writeheader()
+                writer.writerow({'business_name': 'Cerca', 'address': 'Calle 1', 'description': 'd',
+                                 'phone_number': '1', 'email': 'c@dely.co', 'status': 'True',
+                                 'business_type': 'Restaurante'})
+            with override_settings(BASE_DIR=base_dir):
+                call_command('load_restaurants_complete', stdout=StringIO())
+
+        results = self.client.get('/api/nearby-businesses/', params).json()['results']
+        self.assertEqual([r['id'] for r in results], [self.business.id])
+
+    def test_non_finite_distance_is_rejected(self):
+        for distance in ('nan', '-inf', '0'):
+            response = self.client.get('/api/nearby-businesses/', {'lat': 6.24, 'lon': -75.58, 'distance': distance})
+            self.assertEqual(response.status_code, 400, distance)
+
+    def test_post_body_must_be_an_object(self):
+        for body in ('[1, 2]', 'null', '5', '"texto"'):
+            response = self.client.post('/api/nearby-businesses/', body, content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+        response = self.client.post('/api/nearby-businesses/', '{"latitude": 6.2442, "longitude": -75.5812}',
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_ignores_non_finite_distance(self):
+        response = self.client.get('/', {'nearby': 'true', 'lat': 6.24, 'lon': -75.58, 'distance': 'nan'})
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,78 @@
+"""Saldo de puntos bajo canjes concurrentes."""
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import QuerySet, Sum
+from django.test import TransactionTestCase
+
+from appdely.management.commands.benchmark_redemptions import run_redemptions
+from appdely.models import InsufficientPoints, Point, PointBalance
+
+
+class ConcurrentRedemptionTests(TransactionTestCase):
+    WORKERS = 8
+    ATTEMPTS = 120
+    COST = 5
+    MAX_RETRIES = 200
+
+    def setUp(self):
+        self.user = get_user_model().objects.create(username='canjes')
+        # Alcanza para la mitad de los intentos
+        self.initial = self.COST * (self.ATTEMPTS // 2)
+        Point.objects.create(user=self.user, amount=self.initial, description='Saldo de prueba', movement_type='earn')
+
+    def test_concurrent_redemptions_never_overdraw(self):
+        results, elapsed = run_redemptions(self.user, self.WORKERS, self.ATTEMPTS, self.COST, max_retries=self.MAX_RETRIES)
+        print(f"\n{self.ATTEMPTS} canjes con {self.WORKERS} hilos: {self.ATTEMPTS / elapsed:.0f} canjes/s")
+
+        # Un canje que agota los reintentos (bloqueo que no se libera) hace fallar la prueba
+        self.assertEqual(results.count('error'), 0)
+        ok = results.count('ok')
+        balance = PointBalance.objects.get(user=self.user)
+        history = Point.objects.filter(user=self.user).aggregate(total=Sum('amount'))['total']
+        # Todos los intentos terminan aceptados o rechazados: se canjea justo el saldo inicial
+        self.assertEqual(ok, self.initial // self.COST)
+        self.assertEqual(results.count('rejected'), self.ATTEMPTS - ok)
+        self.assertGreaterEqual(balance.total, 0)
+        self.assertEqual(balance.total, history)
+        self.assertEqual(balance.total, self.initial - ok * self.COST)
+        self.assertEqual(balance.redeemed, ok * self.COST)
+
+    def test_redeem_all_then_reject(self):
+        for _ in range(self.initial // self.COST):
+            PointBalance.redeem(self.user, self.COST, description='Canje')
+        with self.assertRaises(InsufficientPoints):
+            PointBalance.redeem(self.user, self.COST, description='Canje')
+        self.assertEqual(PointBalance.objects.get(user=self.user).total, 0)
+        self.assertEqual(Point.objects.filter(user=self.user, movement_type='redeem').count(), self.initial // self.COST)
+
+    def test_overdraft_survives_creation_race(self):
+        # Simula que otra petición crea la fila entre el UPDATE (sin filas) y el INSERT
+        other = get_user_model().objects.create(username='carrera')
+        real_update = QuerySet.update
+        calls = []
+
+        def update_after_race(queryset, **kwargs):
+            if not calls:
+                calls.append(1)
+                PointBalance.objects.create(user=other, total=0)
+                return 0
+            return real_update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', update_after_race):
+            PointBalance.apply(other.pk, -10, 'redeem', allow_overdraft=True)
+        self.assertEqual(PointBalance.objects.get(user=other).total, -10)
+
+
+class BenchmarkRedemptionsCommandTests(TransactionTestCase):
+    def test_reports_throughput_and_cleans_up(self):
+        existing = get_user_model().objects.create(username='benchmark_redemptions')
+        out = StringIO()
+        call_command('benchmark_redemptions', '--workers', '4', '--attempts', '40', stdout=out)
+        self.assertIn('canjes/s', out.getvalue())
+        self.assertIn('Sin sobregiros', out.getvalue())
+        # Solo se borra el usuario desechable que crea el comando
+        self.assertEqual(list(get_user_model().objects.all()), [existing])
+        self.assertFalse(Point.objects.exists())
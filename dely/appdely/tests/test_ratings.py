@@ -0,0 +1,91 @@
+"""Calificaciones rápidas (Rating) y sus agregados en Business."""
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from appdely.models import Business, BusinessType, Rating, Review
+
+
+class RatingTests(TestCase):
+    def setUp(self):
+        business_type = BusinessType.objects.create(description='Restaurante')
+        self.business, self.other = [
+            Business.objects.create(business_name=name, address='Calle 1', description='d', phone_number='1',
+                                    email='n@dely.co', business_type=business_type)
+            for name in ('Uno', 'Dos')
+        ]
+        self.user = get_user_model().objects.create(username='califica')
+
+    def assertStars(self, business, star_sum, star_count):
+        business.refresh_from_db()
+        self.assertEqual((business.star_sum, business.star_count), (star_sum, star_count))
+
+    def test_rate_upserts_and_adjusts_aggregates(self):
+        self.assertTrue(Rating.rate(self.user.pk, self.business.pk, 4))
+        self.assertFalse(Rating.rate(self.user.pk, self.business.pk, 4))
+        self.assertStars(self.business, 4, 1)
+        self.assertTrue(Rating.rate(self.user.pk, self.business.pk, 2))
+        self.assertStars(self.business, 2, 1)
+        self.assertEqual(Rating.objects.get().previous_stars, 4)
+
+    def test_rate_stores_datetimes_like_the_orm(self):
+        Rating.rate(self.user.pk, self.business.pk, 5)
+        Rating.objects.create(user=get_user_model().objects.create(username='orm'), business=self.business, stars=3)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT updated_at FROM {Rating._meta.db_table} ORDER BY id")
+            raw, orm = [str(row[0]) for row in cursor.fetchall()]
+        self.assertEqual(len(raw), len(orm))
+        self.assertEqual(Rating.objects.filter(updated_at__lte=Rating.objects.get(stars=3).updated_at).count(), 2)
+
+    def test_orm_saves_and_deletes_adjust_aggregates(self):
+        rating = Rating.objects.create(user=self.user, business=self.business, stars=5)
+        self.assertStars(self.business, 5, 1)
+        rating = Rating.objects.get(pk=rating.pk)
+        rating.stars = 3
+        rating.save()
+        self.assertStars(self.business, 3, 1)
+        rating.business = self.other
+        rating.save()
+        self.assertStars(self.business, 0, 0)
+        self.assertStars(self.other, 3, 1)
+        rating.delete()
+        self.assertStars(self.other, 0, 0)
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def test_rate_business_rejects_non_object_body(self):
+        self.client.force_login(self.user)
+        response = self.client.post('/rate-business/', json.dumps([1, 2]), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/rate-business/', json.dumps({'business_id': self.business.pk, 'stars': 4}),
+                                    content_type='application/json')
+        self.assertEqual(response.json(), {'success': True, 'changed': True})
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def test_rating_click_changes_the_rating_users_see(self):
+        Business.objects.filter(pk=self.business.pk).update(latitude=6.2442, longitude=-75.5812)
+        Review.objects.create(business=self.business, user=get_user_model().objects.create(username='resena'), rating=2)
+        self.business.refresh_from_db()
+        score = self.business.discovery_score
+        self.assertEqual((self.business.rating_avg, self.business.average_rating()), (2.0, 2.0))
+
+        self.client.force_login(self.user)
+        self.client.post('/rate-business/', json.dumps({'business_id': self.business.pk, 'stars': 5}),
+                         content_type='application/json')
+        self.business.refresh_from_db()
+        self.assertEqual((self.business.rating_avg, self.business.average_rating()), (3.5, 3.5))
+        self.assertGreater(self.business.discovery_score, score)
+
+        # Tarjeta del listado, API de cercanos y orden por calificación
+        self.assertContains(self.client.get('/'), '3.5')
+        results = self.client.get('/api/nearby-businesses/', {'lat': 6.2442, 'lon': -75.5812}).json()['results']
+        self.assertEqual(results[0]['rating'], 3.5)
+        self.assertEqual(Business.objects.order_by('-rating_avg', 'id').first(), self.business)
+
+        # Los agregados reconstruidos coinciden con los ajustados por deltas
+        before = Business.objects.values_list('rating_avg', 'discovery_score').get(pk=self.business.pk)
+        Business.objects.all().rebuild_rating_aggregates()
+        after = Business.objects.values_list('rating_avg', 'discovery_score').get(pk=self.business.pk)
+        self.assertAlmostEqual(before[0], after[0])
+        self.assertAlmostEqual(before[1], after[1], places=4)
@@ -0,0 +1,62 @@
+"""Filtrado colaborativo ítem-ítem: recálculo incremental frente a completo."""
+import random
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from appdely.models import Business, BusinessSimilarity, BusinessType, Favorite, Review
+from appdely.recommendations import recommend
+
+
+class BuildRecommendationsTests(TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        business_type = BusinessType.objects.create(description='Restaurante')
+        self.businesses = [
+            Business.objects.create(business_name=f'Negocio {i}', address='Calle 1', description='d',
+                                    phone_number='1', email='n@dely.co', business_type=business_type)
+            for i in range(15)
+        ]
+        User = get_user_model()
+        self.users = [User.objects.create(username=f'usuario{i}') for i in range(30)]
+        for user in self.users:
+            for business in rng.sample(self.businesses, 6):
+                Review.objects.create(business=business, user=user, rating=rng.randint(1, 5))
+            for business in rng.sample(self.businesses, 2):
+                Favorite.objects.get_or_create(user=user, business=business)
+
+    def build(self, *args):
+        call_command('build_recommendations', '--block-size', '4', *args, stdout=StringIO(), stderr=StringIO())
+        return {
+            (business_id, similar_id): round(score, 9)
+            for business_id, similar_id, score in BusinessSimilarity.objects.values_list('business_id', 'similar_id', 'score')
+        }
+
+    def test_incremental_matches_full_after_editing_a_review(self):
+        before = self.build('--full')
+        self.assertTrue(before)
+
+        review = Review.objects.filter(rating__lte=2).order_by('id').first()
+        review.rating = 5
+        review.save()
+
+        incremental = self.build()
+        self.assertNotEqual(incremental, before)
+        self.assertEqual(incremental, self.build('--full'))
+
+    def test_incremental_without_changes_rewrites_nothing(self):
+        self.build('--full')
+        ids = set(BusinessSimilarity.objects.values_list('id', flat=True))
+        self.build()
+        self.assertEqual(set(BusinessSimilarity.objects.values_list('id', flat=True)), ids)
+
+    def test_recommend_excludes_seen_businesses(self):
+        self.build('--full')
+        user = self.users[0]
+        seen = set(Review.objects.filter(user=user).values_list('business_id', flat=True))
+        seen |= set(Favorite.objects.filter(user=user).values_list('business_id', flat=True))
+        ranked = recommend(user, limit=5)
+        self.assertTrue(ranked)
+        self.assertFalse(seen & {business_id for business_id, _ in ranked})
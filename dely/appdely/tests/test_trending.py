@@ -0,0 +1,99 @@
+"""Sketch de tendencia (Space-Saving con decaimiento) y su publicación."""
+import random
+from collections import Counter
+
+from django.core.cache import cache as default_cache
+from django.test import SimpleTestCase
+
+from appdely import cache, trending
+from appdely.trending import DecayedSpaceSaving, TrendingTracker
+
+
+class ScanSpaceSaving(DecayedSpaceSaving):
+    """Referencia: busca el mínimo recorriendo todas las cuentas."""
+
+    def add(self, item, amount=1.0, now=None):
+        weight = amount * 2 ** ((now - self.landmark) / self.half_life)
+        entry = self.counts.get(item)
+        if entry is not None:
+            entry[0] += weight
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = [weight, 0.0]
+        else:
+            victim = min(self.counts, key=lambda key: (self.counts[key][0], key))
+            floor = self.counts.pop(victim)[0]
+            self.counts[item] = [floor + weight, floor]
+
+
+class DecayedSpaceSavingTests(SimpleTestCase):
+    def stream(self, n, seed=1):
+        rng = random.Random(seed)
+        # Zipf aproximado: pocos negocios muy visitados y una cola larga
+        return [(int(rng.paretovariate(1.2)), i * 0.5) for i in range(n)]
+
+    def test_heap_eviction_matches_scan(self):
+        sketch = DecayedSpaceSaving(50, 3600, landmark=0)
+        reference = ScanSpaceSaving(50, 3600, landmark=0)
+        for item, now in self.stream(5000):
+            sketch.add(item, now=now)
+            reference.add(item, now=now)
+        self.assertEqual(sketch.counts.keys(), reference.counts.keys())
+        for item, (count, error) in sketch.counts.items():
+            self.assertAlmostEqual(count, reference.counts[item][0], places=6)
+            self.assertAlmostEqual(error, reference.counts[item][1], places=6)
+
+    def test_frequent_items_are_kept(self):
+        events = self.stream(20000, seed=2)
+        sketch = DecayedSpaceSaving(100, 10 ** 9, landmark=0)
+        for item, now in events:
+            sketch.add(item, now=now)
+        exact = [item for item, _ in Counter(item for item, _ in events).most_common(10)]
+        self.assertEqual([item for item, _ in sketch.top(10, now=events[-1][1])], exact)
+
+    def test_eviction_after_rescale_and_merge(self):
+        sketch = DecayedSpaceSaving(10, 1, landmark=0)
+        other = DecayedSpaceSaving(10, 1, landmark=0)
+        for i in range(30):
+            other.add(i % 12, now=i)
+        # Más de 64 vidas medias: se adelanta la referencia antes de sumar
+        for i in range(200):
+            sketch.add(i % 15, now=100 + i * 0.1)
+        sketch.merge(other)
+        sketch.add(999, now=130)
+        self.assertEqual(len(sketch.counts), 10)
+        self.assertEqual(len(sketch._heap), 10)
+        restored = DecayedSpaceSaving.from_dict(sketch.to_dict(), 10)
+        restored.add(1000, now=131)
+        self.assertIn(1000, restored.counts)
+        self.assertEqual(len(restored.counts), 10)
+
+
+class TrendingPublishTests(SimpleTestCase):
+    def setUp(self):
+        default_cache.clear()
+
+    def test_publish_invalidates_first_page_only_when_order_changes(self):
+        tracker = TrendingTracker()
+        tracker._publisher = object()  # sin hilo en segundo plano
+        version = lambda: cache.group_versions([trending.PAGE_GROUP])[0]
+
+        start = version()
+        tracker.record(1)
+        tracker.record(1)
+        tracker.record(2)
+        self.assertEqual([item for item, _ in tracker.publish()], [1, 2])
+        changed = version()
+        self.assertNotEqual(changed, start)
+
+        tracker.record(1)
+        tracker.publish()
+        self.assertEqual(version(), changed)
+
+    def test_page_group(self):
+        from django.test import RequestFactory
+
+        factory = RequestFactory()
+        self.assertEqual(trending.page_group(factory.get('/')), trending.PAGE_GROUP)
+        self.assertEqual(trending.page_group(factory.get('/', {'sort': 'discovery'})), trending.PAGE_GROUP)
+        for params in ({'q': 'pizza'}, {'cursor': 'abc'}, {'nearby': 'true'}):
+            self.assertIsNone(trending.page_group(factory.get('/', params)))
@@ -0,0 +1,251 @@
+"""Negocios en tendencia a partir de las visitas recientes.
+
+Cada visita de business_detail entra en un sketch Space-Saving en memoria (por
+proceso) con decaimiento exponencial: una visita pesa la mitad cada HALF_LIFE
+segundos. Se usa decaimiento hacia adelante: cada visita suma
+exp(λ·(t - referencia)), así que nada se recalcula con el paso del tiempo y la
+referencia solo se adelanta cuando los pesos crecen demasiado. El sketch guarda
+como mucho CAPACITY negocios, sea cual sea el tamaño del catálogo: al llegar uno
+nuevo con el sketch lleno sustituye al de menor cuenta y hereda esa cuenta como
+error máximo (los negocios frecuentes nunca se pierden). El de menor cuenta sale
+de un montículo, así que una sustitución cuesta O(log CAPACITY) y no un recorrido.
+
+Un hilo en segundo plano publica cada PUBLISH_INTERVAL segundos: fusiona el
+sketch local en el compartido (guardado en la caché de Django, con un cerrojo
+para no pisar a otros procesos) y guarda aparte la lista de los TOP_N primeros,
+de modo que leer la tendencia es una sola lectura de caché de N elementos. Si
+el orden publicado cambia, se invalida el grupo 'trending' de la caché de páginas
+(solo la primera página del listado sin filtros, ver page_group).
+
+Configuración (settings.DELY_TRENDING):
+    ALIAS             caché de settings.CACHES a usar (por defecto 'default')
+    HALF_LIFE         segundos en que una visita pierde la mitad de su peso (por defecto 3600)
+    CAPACITY          negocios que guarda cada sketch (por defecto 500)
+    TOP_N             negocios de la lista publicada (por defecto 20)
+    PUBLISH_INTERVAL  segundos entre publicaciones (por defecto 60)
+"""
+import atexit
+import heapq
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import cache as view_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ALIAS': 'default',
+    'HALF_LIFE': 3600,
+    'CAPACITY': 500,
+    'TOP_N': 20,
+    'PUBLISH_INTERVAL': 60,
+}
+
+KEY_PREFIX = 'dely:trending'
+STATE_KEY = f'{KEY_PREFIX}:sketch'
+TOP_KEY = f'{KEY_PREFIX}:top'
+LOCK_KEY = f'{KEY_PREFIX}:lock'
+PAGE_GROUP = 'trending'
+
+# Vidas medias tras las que se adelanta la referencia (2**64 como peso máximo)
+RESCALE_HALF_LIVES = 64
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'DELY_TRENDING', {})}
+
+
+def get_cache():
+    return caches[get_config()['ALIAS']]
+
+
+class DecayedSpaceSaving:
+    """Space-Saving con decaimiento exponencial hacia adelante."""
+
+    def __init__(self, capacity, half_life, landmark=None):
+        self.capacity = capacity
+        self.half_life = half_life
+        self.rate = math.log(2) / half_life
+        self.landmark = time.time() if landmark is None else landmark
+        self.counts = {}  # negocio -> [cuenta, error], en pesos relativos a landmark
+        # Montículo de mínimos con una entrada (cuenta, negocio) por negocio; como las cuentas
+        # solo crecen, una entrada puede quedarse por debajo de la real y se corrige al salir
+        self._heap = []
+
+    def add(self, item, amount=1.0, now=None):
+        now = time.time() if now is None else now
+        if now - self.landmark > RESCALE_HALF_LIVES * self.half_life:
+            self.rescale(now)
+        weight = amount * math.exp(self.rate * (now - self.landmark))
+
+        entry = self.counts.get(item)
+        if entry is not None:
+            entry[0] += weight
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = [weight, 0.0]
+            heapq.heappush(self._heap, (weight, item))
+        else:
+            floor = self._pop_min()
+            self.counts[item] = [floor + weight, floor]
+            heapq.heappush(self._heap, (floor + weight, item))
+
+    def _pop_min(self):
+        """Saca el negocio de menor cuenta y devuelve su cuenta."""
+        while True:
+            count, item = heapq.heappop(self._heap)
+            current = self.counts[item][0]
+            if current == count:
+                del self.counts[item]
+                return count
+            # Entrada desfasada: vuelve con su cuenta actual
+            heapq.heappush(self._heap, (current, item))
+
+    def _rebuild_heap(self):
+        self._heap = [(entry[0], item) for item, entry in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def rescale(self, landmark):
+        """Adelanta la referencia a landmark multiplicando todas las cuentas por el mismo factor."""
+        factor = math.exp(-self.rate * (landmark - self.landmark))
+        for entry in self.counts.values():
+            entry[0] *= factor
+            entry[1] *= factor
+        # Multiplicar por un factor positivo no altera el orden del montículo
+        self._heap = [(count * factor, item) for count, item in self._heap]
+        self.landmark = landmark
+
+    def merge(self, other):
+        """Suma otro sketch (misma vida media) y se queda con los capacity de más peso."""
+        landmark = max(self.landmark, other.landmark)
+        self.rescale(landmark)
+        factor = math.exp(-self.rate * (landmark - other.landmark))
+        for item, (count, error) in other.counts.items():
+            entry = self.counts.setdefault(item, [0.0, 0.0])
+            entry[0] += count * factor
+            entry[1] += error * factor
+        if len(self.counts) > self.capacity:
+            keep = sorted(self.counts.items(), key=lambda kv: kv[1][0], reverse=True)[:self.capacity]
+            self.counts = dict(keep)
+        self._rebuild_heap()
+
+    def top(self, n, now=None):
+        """[(negocio, visitas decaídas a now)] de los n de más peso."""
+        now = time.time() if now is None else now
+        scale = math.exp(-self.rate * (now - self.landmark))
+        ranked = sorted(self.counts.items(), key=lambda kv: (-kv[1][0], kv[0]))[:n]
+        return [(item, count * scale) for item, (count, _) in ranked]
+
+    def to_dict(self):
+        return {'landmark': self.landmark, 'half_life': self.half_life, 'counts': self.counts}
+
+    @classmethod
+    def from_dict(cls, data, capacity):
+        sketch = cls(capacity, data['half_life'], landmark=data['landmark'])
+        sketch.counts = {item: list(entry) for item, entry in data['counts'].items()}
+        sketch._rebuild_heap()
+        return sketch
+
+
+class TrendingTracker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = None
+        self._publisher = None
+
+    def _new_sketch(self, config):
+        return DecayedSpaceSaving(config['CAPACITY'], config['HALF_LIFE'])
+
+    def record(self, business_id):
+        config = get_config()
+        with self._lock:
+            if self._local is None:
+                self._local = self._new_sketch(config)
+            self._local.add(business_id)
+            if self._publisher is None:
+                self._start_publisher(config['PUBLISH_INTERVAL'])
+
+    def publish(self):
+        """Fusiona las visitas locales en el sketch compartido y publica el top; devuelve el top."""
+        config = get_config()
+        with self._lock:
+            local, self._local = self._local, None
+        if local is None or not local.counts:
+            return None
+
+        cache = get_cache()
+        # Cerrojo con caducidad: si otro proceso está publicando, se reintenta en el siguiente ciclo
+        if not cache.add(LOCK_KEY, 1, config['PUBLISH_INTERVAL']):
+            self._restore(local)
+            return None
+        try:
+            state = cache.get(STATE_KEY)
+            shared = self._new_sketch(config)
+            if state is not None and state['half_life'] == config['HALF_LIFE']:
+                shared = DecayedSpaceSaving.from_dict(state, config['CAPACITY'])
+            shared.merge(local)
+            top = shared.top(config['TOP_N'])
+            previous = cache.get(TOP_KEY) or []
+            cache.set_many({STATE_KEY: shared.to_dict(), TOP_KEY: top}, None)
+            if [item for item, _ in top] != [item for item, _ in previous]:
+                view_cache.invalidate(PAGE_GROUP)
+            return top
+        except Exception:
+            self._restore(local)
+            raise
+        finally:
+            cache.delete(LOCK_KEY)
+
+    def _restore(self, local):
+        with self._lock:
+            if self._local is not None:
+                local.merge(self._local)
+            self._local = local
+
+    def _start_publisher(self, interval):
+        self._publisher = threading.Thread(target=self._run, args=(interval,), name='dely-trending', daemon=True)
+        self._publisher.start()
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.publish()
+            except Exception:
+                logger.exception("Error publicando la tendencia")
+
+
+tracker = TrendingTracker()
+
+
+def record(business_id):
+    tracker.record(business_id)
+
+
+def publish():
+    return tracker.publish()
+
+
+def page_group(request):
+    """Grupo de caché de páginas para cache_view: solo la primera página del listado sin filtros muestra la tendencia."""
+    if request.GET.get('q') or request.GET.get('cursor') or request.GET.get('nearby', 'false').lower() == 'true':
+        return None
+    return PAGE_GROUP
+
+
+def trending(n=None):
+    """[(business_id, visitas recientes)] publicados, de más a menos; lectura O(N) de la caché."""
+    top = get_cache().get(TOP_KEY) or []
+    return top if n is None else top[:n]
+
+
+@atexit.register
+def _publish_on_exit():
+    try:
+        tracker.publish()
+    except Exception:
+        logger.exception("Error publicando la tendencia al salir")
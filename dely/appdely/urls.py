@@ -6,4 +6,6 @@ urlpatterns = [
     path('business/<int:business_id>/', views.business_detail, name='business_detail'),
     path('business/<int:business_id>/add_review/', views.add_review, name='add_review'),
     path('rate-business/', views.rate_business, name='rate_business'),
+    path('api/favorites/toggle/', views.toggle_favorite, name='toggle_favorite'),
+    path('api/nearby-businesses/', views.nearby_businesses_api, name='nearby_businesses_api'),
 ]
\ No newline at end of file
@@ -0,0 +1,23 @@
+import re
+import unicodedata
+from itertools import islice
+
+
+def normalize_name(s):
+    """Normaliza un texto para compararlo: minúsculas, sin tildes ni puntuación y espacios simples."""
+    if not s:
+        return ""
+    s = s.lower().strip()
+    s = unicodedata.normalize("NFKD", s)
+    s = s.encode("ascii", "ignore").decode("ascii")  # quita tildes
+    s = s.replace("&", "and").replace(".", " ")
+    s = re.sub(r"[^\w\s]", " ", s)  # elimina puntuación
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+
+def chunked(iterable, size):
+    """Recorre iterable en listas de hasta size elementos, sin materializarlo entero."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
@@ -2,6 +2,7 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 import json
+from django.db import IntegrityError
 
 @csrf_exempt
 @login_required
@@ -9,43 +10,86 @@ def rate_business(request):
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
-            business_id = data.get('business_id')
+            business_id = int(data.get('business_id'))
             stars = int(data.get('stars'))
-            if stars < 1 or stars > 5:
-                return JsonResponse({'success': False, 'error': 'La calificación debe ser entre 1 y 5.'})
-            from .models import Business, Rating
-            business = Business.objects.get(id=business_id)
-            rating, created = Rating.objects.get_or_create(user=request.user, business=business)
-            rating.stars = stars
-            rating.save()
-            return JsonResponse({'success': True})
-        except Exception as e:
-            return JsonResponse({'success': False, 'error': str(e)})
+        except (TypeError, ValueError, AttributeError):
+            return JsonResponse({'success': False, 'error': 'Datos inválidos.'}, status=400)
+        if stars < 1 or stars > 5:
+            return JsonResponse({'success': False, 'error': 'La calificación debe ser entre 1 y 5.'})
+        from .models import Rating
+        try:
+            # Un solo upsert; repetir las mismas estrellas no escribe nada
+            changed = Rating.rate(request.user.pk, business_id, stars)
+        except IntegrityError:
+            return JsonResponse({'success': False, 'error': 'El negocio no existe.'}, status=404)
+        return JsonResponse({'success': True, 'changed': changed})
     return JsonResponse({'success': False, 'error': 'Método no permitido.'})
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from .models import Business, Review
+from . import counters, favorites, nearby_cache, recommendations, search, trending
+from .cache import cache_view
+from .pagination import KeysetPaginator, paginate_ranked
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q, Count, Avg
 from django.db import models
+from django.templatetags.static import static
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.views.decorators.http import require_http_methods
+import hashlib
+import math
 
 User = get_user_model()
 
-# Lista de negocios
+# Ordenaciones disponibles para la lista (la última clave es única para paginar por cursor)
+BUSINESS_SORTS = {
+    'id': ['id'],
+    'rating': ['-rating_avg', 'id'],
+    'discovery': ['-discovery_score', 'id'],
+}
+BUSINESSES_PER_PAGE = 24
+RECOMMENDED_PER_PAGE = 6
+TRENDING_PER_PAGE = 6
+
+# API de cercanos: coordenadas redondeadas a 3 decimales (~110 m) para que las
+# peticiones de usuarios vecinos compartan respuesta en las cachés HTTP
+NEARBY_COORD_DECIMALS = 3
+NEARBY_DEFAULT_LIMIT = 20
+NEARBY_MAX_LIMIT = 100
+NEARBY_MAX_DISTANCE = 50
+NEARBY_MAX_AGE = 60
+
+
+# Lista de negocios (cacheada; se invalida al cambiar negocios, imágenes o reseñas, la
+# de cada usuario al cambiar sus favoritos y la primera página al cambiar la tendencia)
+@cache_view('business', favorites.page_group, trending.page_group)
 def business_list(request):
     query = request.GET.get('q', '')
     nearby = request.GET.get('nearby', 'false').lower() == 'true'  # Filtro de negocios cercanos
     max_distance = float(request.GET.get('distance', '5'))  # Distancia máxima en km (por defecto 5)
+    sort = request.GET.get('sort', 'id')
+    if sort not in BUSINESS_SORTS:
+        sort = 'id'
+    cursor = request.GET.get('cursor')
 
     # Filtrar solo negocios activos y agregar análisis (número de reseñas y calificación promedio)
-    businesses = Business.objects.filter(status='True')
+    businesses = Business.objects.filter(status='True').for_cards()
     
 
-    # Búsqueda por nombre o descripción
+    page = None
+
+    # Búsqueda por nombre o descripción (índice de texto completo, ordenado por relevancia)
+    ranked_matches = None
     if query:
-        businesses = businesses.filter(
-            Q(business_name__icontains=query) | Q(description__icontains=query)
-        )
+        ranked_matches = search.search('business', query)
+        if ranked_matches is None:
+            # Motor sin índice de texto completo
+            businesses = businesses.filter(
+                Q(business_name__icontains=query) | Q(description__icontains=query)
+            )
+        else:
+            businesses = businesses.filter(id__in=[business_id for business_id, _ in ranked_matches])
 
     # Filtro de negocios cercanos según coordenadas
     if nearby:
@@ -56,36 +100,140 @@ def business_list(request):
             try:
                 user_lat = float(user_lat)
                 user_lon = float(user_lon)
+                # Prefiltro indexado + puntuación vectorizada; se pagina sobre (distancia, id).
+                # Sin búsqueda, los candidatos salen de la caché por celda (ver nearby_cache.py)
+                if query:
+                    ranked = businesses.nearby(user_lat, user_lon, max_distance)
+                else:
+                    ranked = nearby_cache.nearby(user_lat, user_lon, max_distance)
+                page = paginate_ranked(ranked, BUSINESSES_PER_PAGE, cursor)
+                found = businesses.in_bulk([business_id for business_id, _ in page])
                 nearby_businesses = []
-
-                for business in businesses:
-                    if business.latitude and business.longitude:
-                        distance = business.calcular_distancia(user_lat, user_lon)
-                        if distance and distance <= max_distance:
-                            business.distance = round(distance, 2)  # Guardar la distancia
-                            nearby_businesses.append(business)
-
-                # Ordenar por distancia
-                nearby_businesses.sort(key=lambda x: x.distance)
-                businesses = nearby_businesses
+                for business_id, distance in page:
+                    business = found.get(business_id)
+                    if business is None:
+                        continue  # Candidato de caché que ya no está activo
+                    business.distance = distance  # Guardar la distancia
+                    nearby_businesses.append(business)
+                page.object_list = nearby_businesses
+                sort = 'distance'
 
             except (ValueError, TypeError):
                 pass  # Ignorar si hay error con coordenadas
 
+    if page is None and ranked_matches is not None and 'sort' not in request.GET:
+        page = paginate_ranked(ranked_matches, BUSINESSES_PER_PAGE, cursor)
+        found = businesses.in_bulk([business_id for business_id, _ in page])
+        page.object_list = [found[business_id] for business_id, _ in page if business_id in found]
+        sort = 'relevance'
+
+    if page is None:
+        page = KeysetPaginator(businesses, BUSINESS_SORTS[sort], BUSINESSES_PER_PAGE).get_page(cursor)
+
+    # Recomendados para el usuario (vecinos precalculados) y en tendencia (lista publicada),
+    # solo en la primera página sin filtros
+    recommended = trending_now = []
+    if not (query or nearby or cursor):
+        ranked_trending = trending.trending(TRENDING_PER_PAGE)
+        ranked_recommended = []
+        if request.user.is_authenticated:
+            ranked_recommended = recommendations.recommend(request.user, limit=RECOMMENDED_PER_PAGE)
+        found = Business.objects.filter(status=True).with_cover_image().in_bulk(
+            [business_id for business_id, _ in ranked_trending + ranked_recommended]
+        )
+        trending_now = [found[business_id] for business_id, _ in ranked_trending if business_id in found]
+        recommended = [found[business_id] for business_id, _ in ranked_recommended if business_id in found]
+
+    # Parámetros actuales sin el cursor, para construir los enlaces de paginación
+    params = request.GET.copy()
+    params.pop('cursor', None)
+
     # Renderizar el template
     return render(request, 'appdely/business_list.html', {
-        'businesses': businesses,
+        'businesses': page,
         'query': query,
         'nearby': nearby,
         'max_distance': max_distance,
+        'sort': sort,
+        'base_query': params.urlencode(),
+        'recommended': recommended,
+        'trending': trending_now,
+        # Un conjunto por petición: el estado del corazón de cada tarjeta no consulta la BD
+        'favorite_ids': favorites.favorite_ids(request.user),
     })
 
 
+def _image_src(image_url):
+    """URL pública de una imagen guardada como URL absoluta o como archivo de static/appdely/img/."""
+    if not image_url:
+        return None
+    return image_url if 'http' in image_url else static('appdely/img/' + image_url)
+
+
+# API JSON de negocios cercanos (la usa geolocation.js)
+@require_http_methods(['GET', 'POST'])
+def nearby_businesses_api(request):
+    """GET ?lat=&lon=[&distance=&limit=] (o POST JSON con latitude/longitude) -> negocios cercanos.
+
+    Solo las respuestas GET llevan cabeceras de caché (Cache-Control y ETag); POST se
+    mantiene por compatibilidad.
+    """
+    params = request.GET
+    if request.method == 'POST':
+        try:
+            params = json.loads(request.body or '{}')
+        except ValueError:
+            return JsonResponse({'error': 'JSON inválido.'}, status=400)
+        if not isinstance(params, dict):
+            return JsonResponse({'error': 'JSON inválido.'}, status=400)
+    try:
+        lat = round(float(params.get('lat', params.get('latitude'))), NEARBY_COORD_DECIMALS)
+        lon = round(float(params.get('lon', params.get('longitude'))), NEARBY_COORD_DECIMALS)
+        max_distance = min(float(params.get('distance', 5)), NEARBY_MAX_DISTANCE)
+        limit = max(1, min(int(params.get('limit', NEARBY_DEFAULT_LIMIT)), NEARBY_MAX_LIMIT))
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'Parámetros lat/lon, distance o limit inválidos.'}, status=400)
+    # nan pasa las comparaciones (todas dan False): se rechaza aparte
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180) or not math.isfinite(max_distance) or max_distance <= 0:
+        return JsonResponse({'error': 'Coordenadas o distancia fuera de rango.'}, status=400)
+
+    businesses = Business.objects.filter(status=True)
+    ranked = nearby_cache.nearby(lat, lon, max_distance, limit=limit)
+    found = businesses.only('id', 'business_name', 'rating_avg', 'review_count').with_cover_image() \
+        .in_bulk([business_id for business_id, _ in ranked])
+    results = []
+    for business_id, distance in ranked:
+        business = found.get(business_id)
+        if business is None:
+            continue
+        cover = business.cover_image
+        results.append({
+            'id': business.id,
+            'name': business.business_name,
+            'distance_km': distance,
+            'rating': round(business.rating_avg, 1),
+            'reviews': business.review_count,
+            'image': _image_src(cover.image_url) if cover else None,
+            'url': reverse('business_detail', args=[business.id]),
+        })
+
+    payload = {'lat': lat, 'lon': lon, 'distance': max_distance, 'results': results}
+    response = JsonResponse(payload, json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False})
+    if request.method != 'GET':
+        return response
+    etag = quote_etag(hashlib.md5(response.content).hexdigest())
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=NEARBY_MAX_AGE)
+    return get_conditional_response(request, etag=etag, response=response)
+
+
 # Detalle de negocio con reseñas
 def business_detail(request, business_id):
     business = get_object_or_404(Business, id=business_id)
-    business.visit_count += 1
-    business.save(update_fields=['visit_count'])
+    # Visita contada en memoria; se vuelca a la BD por lotes (ver counters.py)
+    counters.increment(Business, business.pk, 'visit_count')
+    trending.record(business.pk)
+    business.visit_count += counters.pending(Business, business.pk, 'visit_count')
     reviews = Review.objects.filter(business=business).order_by('-date')
     # Opciones de descuento (puedes ampliar)
     descuentos = [
@@ -96,8 +244,8 @@ def business_detail(request, business_id):
 
     puntos = 0
     if request.user.is_authenticated:
-        from appdely.models import Point
-        puntos = Point.objects.filter(user=request.user).aggregate(total=models.Sum('amount'))['total'] or 0
+        from appdely.models import PointBalance
+        puntos = PointBalance.for_user(request.user).total
 
     return render(request, 'appdely/business_detail.html', {
         'business': business,
@@ -143,3 +291,23 @@ def add_review(request, business_id):
     return render(request, 'appdely/add_review.html', {'business': business, 'reviews': reviews})
 
 
+# API JSON de favoritos (corazón de las tarjetas del listado)
+def toggle_favorite(request):
+    """POST JSON {business_id[, favorite]} -> {success, favorite}; sin favorite se alterna."""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Método no permitido.'}, status=405)
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Inicia sesión para guardar favoritos.'}, status=401)
+    try:
+        data = json.loads(request.body)
+        business_id = int(data.get('business_id'))
+        favorite = data.get('favorite')
+        if favorite is not None and not isinstance(favorite, bool):
+            raise ValueError
+    except (TypeError, ValueError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Datos inválidos.'}, status=400)
+    try:
+        favorite = favorites.set_favorite(request.user.pk, business_id, favorite)
+    except IntegrityError:
+        return JsonResponse({'success': False, 'error': 'El negocio no existe.'}, status=404)
+    return JsonResponse({'success': True, 'favorite': favorite})
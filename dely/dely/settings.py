@@ -137,6 +137,47 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 
+# Caché (memoria local por defecto; p. ej. DELY_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# y DELY_CACHE_LOCATION=/var/tmp/dely_cache para compartirla entre procesos)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('DELY_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('DELY_CACHE_LOCATION', 'dely'),
+    }
+}
+
+# Páginas cacheadas con invalidación por señales (ver appdely/cache.py)
+DELY_VIEW_CACHE = {
+    'TIMEOUT': int(os.getenv('DELY_VIEW_CACHE_TIMEOUT', 300)),
+}
+
+# Caché en memoria de candidatos de cercanía (ver appdely/nearby_cache.py)
+DELY_NEARBY_CACHE = {
+    'MAX_ENTRIES': int(os.getenv('DELY_NEARBY_CACHE_MAX_ENTRIES', 256)),
+    'PRECISION': int(os.getenv('DELY_NEARBY_CACHE_PRECISION', 6)),
+    'TTL': int(os.getenv('DELY_NEARBY_CACHE_TTL', 300)),
+}
+
+# Contadores de vistas con escritura diferida (ver appdely/counters.py)
+DELY_COUNTERS = {
+    'FLUSH_INTERVAL': int(os.getenv('DELY_COUNTERS_FLUSH_INTERVAL', 30)),
+    'DURABILITY': os.getenv('DELY_COUNTERS_DURABILITY', 'buffered'),
+}
+
+# Negocios en tendencia: sketch de visitas con decaimiento (ver appdely/trending.py)
+DELY_TRENDING = {
+    'HALF_LIFE': int(os.getenv('DELY_TRENDING_HALF_LIFE', 3600)),
+    'CAPACITY': int(os.getenv('DELY_TRENDING_CAPACITY', 500)),
+    'TOP_N': int(os.getenv('DELY_TRENDING_TOP_N', 20)),
+    'PUBLISH_INTERVAL': int(os.getenv('DELY_TRENDING_PUBLISH_INTERVAL', 60)),
+}
+
+# Conjunto de favoritos de cada usuario en caché (ver appdely/favorites.py)
+DELY_FAVORITES = {
+    'TIMEOUT': int(os.getenv('DELY_FAVORITES_TIMEOUT', 3600)),
+}
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -159,4 +200,11 @@ DELY_CONTACT_EMAIL = os.getenv('DELY_CONTACT_EMAIL', 'dely9595@gmail.com')
 if not EMAIL_HOST_USER or not EMAIL_HOST_PASSWORD:
     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Bandeja de salida: los correos se encolan y los envía send_outbound_emails (ver promociones/outbox.py)
+DELY_OUTBOX = {
+    'BATCH_SIZE': int(os.getenv('DELY_OUTBOX_BATCH_SIZE', 50)),
+    'MAX_ATTEMPTS': int(os.getenv('DELY_OUTBOX_MAX_ATTEMPTS', 5)),
+    'BACKOFF_SECONDS': int(os.getenv('DELY_OUTBOX_BACKOFF_SECONDS', 60)),
+}
+
 # --------------------------------------------------------------------------------
@@ -1,5 +1,21 @@
 from django.contrib import admin
-from .models import TipoPromocion, Promocion, NoticiaRestaurante, UsuarioPromocion
+from django.utils import timezone
+from .fields import DIAS_SEMANA, mascara_a_dias
+from .models import TipoPromocion, Promocion, NoticiaRestaurante, UsuarioPromocion, OutboundEmail
+
+
+class DiaValidoFilter(admin.SimpleListFilter):
+    """Promociones válidas un día de la semana (AND de bits en SQL)"""
+    title = 'día válido'
+    parameter_name = 'dia_valido'
+
+    def lookups(self, request, model_admin):
+        return [(str(dia), nombre) for dia, nombre in DIAS_SEMANA]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(dias_validos__incluye_dia=self.value())
+        return queryset
 
 
 @admin.register(TipoPromocion)
@@ -10,8 +26,8 @@ class TipoPromocionAdmin(admin.ModelAdmin):
 
 @admin.register(Promocion)
 class PromocionAdmin(admin.ModelAdmin):
-    list_display = ('titulo', 'restaurante', 'tipo_promocion', 'fecha_inicio', 'fecha_fin', 'activa', 'vistas', 'usos_actuales')
-    list_filter = ('activa', 'tipo_promocion', 'fecha_inicio', 'fecha_fin', 'restaurante__business_type')
+    list_display = ('titulo', 'restaurante', 'tipo_promocion', 'fecha_inicio', 'fecha_fin', 'dias', 'activa', 'vistas', 'usos_actuales')
+    list_filter = ('activa', 'tipo_promocion', 'fecha_inicio', 'fecha_fin', DiaValidoFilter, 'restaurante__business_type')
     search_fields = ('titulo', 'descripcion', 'restaurante__business_name')
     date_hierarchy = 'fecha_inicio'
     readonly_fields = ('vistas', 'usos_actuales', 'creada_en', 'actualizada_en')
@@ -45,6 +61,11 @@ class PromocionAdmin(admin.ModelAdmin):
         if not change:  # Si es un nuevo objeto
             obj.creada_por = request.user
         super().save_model(request, obj, form, change)
+    
+    @admin.display(description='Días')
+    def dias(self, obj):
+        nombres = dict(DIAS_SEMANA)
+        return ', '.join(nombres[dia][:3] for dia in mascara_a_dias(obj.dias_validos))
 
 
 @admin.register(NoticiaRestaurante)
@@ -91,3 +112,18 @@ class UsuarioPromocionAdmin(admin.ModelAdmin):
     search_fields = ('usuario__username', 'promocion__titulo')
     date_hierarchy = 'fecha_uso'
     readonly_fields = ('fecha_uso',)
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'to')
+    readonly_fields = ('attempts', 'last_error', 'created_at', 'sent_at')
+    actions = ['reintentar']
+
+    @admin.action(description="Reintentar envío")
+    def reintentar(self, request, queryset):
+        queryset.exclude(status=OutboundEmail.SENT).update(
+            status=OutboundEmail.PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
@@ -0,0 +1,87 @@
+"""Días de la semana como máscara de 7 bits (bit 0 = lunes ... bit 6 = domingo).
+
+DiasSemanaField guarda la máscara en un entero pequeño y registra el lookup
+incluye_dia, que se traduce a un AND de bits en SQL:
+
+    Promocion.objects.filter(dias_validos__incluye_dia=3)  # válidas los miércoles
+"""
+from django import forms
+from django.db import models
+
+DIAS_SEMANA = [
+    (1, 'Lunes'),
+    (2, 'Martes'),
+    (3, 'Miércoles'),
+    (4, 'Jueves'),
+    (5, 'Viernes'),
+    (6, 'Sábado'),
+    (7, 'Domingo'),
+]
+
+TODOS_LOS_DIAS = 0b1111111
+
+
+def dia_bit(dia):
+    """Bit del día (1=Lunes, 7=Domingo)."""
+    dia = int(dia)
+    if not 1 <= dia <= 7:
+        raise ValueError(f"Día de la semana fuera de rango: {dia}")
+    return 1 << (dia - 1)
+
+
+def dias_a_mascara(dias):
+    """Máscara a partir de días (1-7); acepta también la forma antigua en texto, p. ej. "12345"."""
+    mascara = 0
+    for dia in dias:
+        mascara |= dia_bit(dia)
+    return mascara
+
+
+def mascara_a_dias(mascara):
+    """Días (1-7) incluidos en la máscara, en orden."""
+    return [dia for dia, _ in DIAS_SEMANA if mascara & dia_bit(dia)]
+
+
+class DiasSemanaFormField(forms.TypedMultipleChoiceField):
+    """Casillas por día; limpia a la máscara entera."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('choices', DIAS_SEMANA)
+        kwargs.setdefault('coerce', int)
+        kwargs.setdefault('widget', forms.CheckboxSelectMultiple)
+        super().__init__(**kwargs)
+
+    def prepare_value(self, value):
+        if isinstance(value, int):
+            return [str(dia) for dia in mascara_a_dias(value)]
+        return value
+
+    def clean(self, value):
+        return dias_a_mascara(super().clean(value))
+
+    def has_changed(self, initial, data):
+        return set(self.prepare_value(initial) or []) != set(data or [])
+
+
+class DiasSemanaField(models.PositiveSmallIntegerField):
+    description = "Días de la semana (máscara de 7 bits)"
+
+    def formfield(self, **kwargs):
+        # Se salta el formulario de IntegerField y su widget numérico (el admin lo pasa
+        # para cualquier subclase de IntegerField): el valor se edita como casillas
+        kwargs['widget'] = forms.CheckboxSelectMultiple
+        return models.Field.formfield(self, **{'form_class': DiasSemanaFormField, **kwargs})
+
+
+@DiasSemanaField.register_lookup
+class IncluyeDia(models.Lookup):
+    """dias_validos__incluye_dia=N: la máscara tiene el bit del día N."""
+    lookup_name = 'incluye_dia'
+
+    def get_prep_lookup(self):
+        return dia_bit(self.rhs)
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'({lhs} & {rhs}) <> 0', (*lhs_params, *rhs_params)
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
+from promociones.fields import dias_a_mascara
 from promociones.models import TipoPromocion, Promocion, NoticiaRestaurante
 from appdely.models import Business
 from django.contrib.auth import get_user_model
@@ -91,7 +92,7 @@ class Command(BaseCommand):
                 'hora_inicio': '12:00',
                 'hora_fin': '15:00',
                 'imagen_principal': 'https://images.unsplash.com/photo-1512621776951-a57141f2eefd?w=400&h=300&fit=crop',
-                'dias_validos': '12345'  # Lunes a viernes
+                'dias_validos': dias_a_mascara([1, 2, 3, 4, 5])  # Lunes a viernes
             },
             {
                 'titulo': '🎂 Postre Gratis en tu Cumpleaños',
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from promociones import outbox
+
+
+class Command(BaseCommand):
+    help = "Envía los correos pendientes de la bandeja de salida (OutboundEmail) por lotes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Seguir ejecutándose y revisar la cola periódicamente")
+        parser.add_argument('--interval', type=float, default=10, help="Segundos entre revisiones con --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = outbox.dispatch()
+            if sent or failed or not options['loop']:
+                self.stdout.write(f"✉️  Enviados: {sent}, con error: {failed}")
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:20
+
+from django.db import migrations
+
+from appdely import search
+
+
+def indexar_contenido(apps, schema_editor):
+    backend = search.get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    Promocion = apps.get_model('promociones', 'Promocion')
+    NoticiaRestaurante = apps.get_model('promociones', 'NoticiaRestaurante')
+    search.index_objects(
+        Promocion, Promocion.objects.iterator(), kind='promocion',
+        document=search.promocion_document, backend=backend, conn=schema_editor.connection,
+    )
+    search.index_objects(
+        NoticiaRestaurante, NoticiaRestaurante.objects.iterator(), kind='noticia',
+        document=search.noticia_document, backend=backend, conn=schema_editor.connection,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('promociones', '0002_businessregistration_subscriber'),
+        ('appdely', '0010_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(indexar_contenido, migrations.RunPython.noop),
+    ]
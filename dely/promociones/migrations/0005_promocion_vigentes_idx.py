@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdely', '0014_businessimage_unique_url'),
+        ('promociones', '0004_outboundemail'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='promocion',
+            index=models.Index(condition=models.Q(('activa', True)), fields=['fecha_fin', 'fecha_inicio'], name='promo_vigentes_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:09
+
+import promociones.fields
+from django.db import migrations
+from django.db.models import Case, F, Value, When
+
+
+def _convertir(Promocion, convertir):
+    # Un solo UPDATE con CASE: cada fila se convierte desde su valor original
+    # (con varios UPDATE, "12" -> "3" se volvería a convertir como miércoles)
+    valores = Promocion.objects.order_by().values_list('dias_validos', flat=True).distinct()
+    casos = [When(dias_validos=valor, then=Value(convertir(valor))) for valor in valores]
+    if casos:
+        Promocion.objects.update(dias_validos=Case(*casos, default=F('dias_validos')))
+
+
+def texto_a_mascara(apps, schema_editor):
+    # "12345" -> "31"; se ignora lo que no sea un día del 1 al 7
+    def convertir(texto):
+        return str(promociones.fields.dias_a_mascara(c for c in (texto or '') if c in '1234567'))
+    _convertir(apps.get_model('promociones', 'Promocion'), convertir)
+
+
+def mascara_a_texto(apps, schema_editor):
+    def convertir(mascara):
+        return ''.join(str(dia) for dia in promociones.fields.mascara_a_dias(int(mascara or 0)))
+    _convertir(apps.get_model('promociones', 'Promocion'), convertir)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('promociones', '0005_promocion_vigentes_idx'),
+    ]
+
+    operations = [
+        # Con la columna aún en texto: se reescribe con la máscara y luego cambia de tipo
+        # (al revertir, se vuelve primero a texto y después se reescriben los días)
+        migrations.RunPython(texto_a_mascara, mascara_a_texto),
+        migrations.AlterField(
+            model_name='promocion',
+            name='dias_validos',
+            field=promociones.fields.DiasSemanaField(default=127, help_text='Días en que es válida (máscara de bits, ver fields.py)'),
+        ),
+    ]
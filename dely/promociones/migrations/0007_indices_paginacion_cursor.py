@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdely', '0019_rating_avg_con_calificaciones'),
+        ('promociones', '0006_dias_validos_mascara'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='noticiarestaurante',
+            index=models.Index(fields=['fecha_publicacion', 'id'], name='noticia_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='promocion',
+            index=models.Index(fields=['creada_en', 'id'], name='promo_cursor_idx'),
+        ),
+    ]
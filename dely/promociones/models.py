@@ -1,8 +1,12 @@
 from django.db import models
+from django.db.models import F, Q
 from django.utils import timezone
 from django.conf import settings
+from appdely import counters
 from appdely.models import Business
 
+from .fields import TODOS_LOS_DIAS, DiasSemanaField, dia_bit
+
 
 class TipoPromocion(models.Model):
     """Tipos de promociones: Descuento, 2x1, Combo, Evento especial, etc."""
@@ -17,6 +21,24 @@ class TipoPromocion(models.Model):
         verbose_name_plural = "Tipos de Promociones"
 
 
+class PromocionQuerySet(models.QuerySet):
+    def activas_ahora(self, ahora=None):
+        """Promociones activas en este momento, con la misma regla que Promocion.esta_activa() pero en SQL.
+
+        El rango de fechas usa el índice parcial promo_vigentes_idx; el límite de
+        usos, el día de la semana y la franja horaria se filtran sobre esas filas.
+        """
+        hoy, hora, dia_semana = Promocion.momento(ahora)
+        return self.filter(
+            Q(limite_personas__isnull=True) | Q(limite_personas=0) | Q(usos_actuales__lt=F('limite_personas')),
+            Q(hora_inicio__isnull=True) | Q(hora_fin__isnull=True) | Q(hora_inicio__lte=hora, hora_fin__gte=hora),
+            activa=True,
+            fecha_inicio__lte=hoy,
+            fecha_fin__gte=hoy,
+            dias_validos__incluye_dia=dia_semana,
+        )
+
+
 class Promocion(models.Model):
     """Promociones de restaurantes y locales de comida"""
     
@@ -41,7 +63,7 @@ class Promocion(models.Model):
     hora_fin = models.TimeField(blank=True, null=True, help_text="Hora de fin diaria")
     
     # Días de la semana (para promociones recurrentes)
-    dias_validos = models.CharField(max_length=20, default="1234567", help_text="1=Lunes, 7=Domingo")
+    dias_validos = DiasSemanaField(default=TODOS_LOS_DIAS, help_text="Días en que es válida (máscara de bits, ver fields.py)")
     
     # Estado y limitaciones
     activa = models.BooleanField(default=True)
@@ -64,13 +86,23 @@ class Promocion(models.Model):
     vistas = models.PositiveIntegerField(default=0)
     me_gusta = models.PositiveIntegerField(default=0)
     
+    objects = PromocionQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.titulo} - {self.restaurante.business_name}"
     
-    def esta_activa(self):
-        """Verifica si la promoción está activa considerando fechas, horas y límites"""
-        hoy = timezone.now().date()
-        ahora = timezone.now().time()
+    @staticmethod
+    def momento(ahora=None):
+        """(fecha, hora, día de la semana 1-7) de un instante; por defecto, el actual"""
+        ahora = ahora or timezone.now()
+        return ahora.date(), ahora.time(), ahora.isoweekday()
+    
+    def esta_activa(self, ahora=None):
+        """Verifica si la promoción está activa considerando fechas, horas y límites
+        
+        Debe coincidir con PromocionQuerySet.activas_ahora(), que aplica la misma regla en SQL.
+        """
+        hoy, ahora, dia_semana = self.momento(ahora)
         
         # Verificar fechas
         if not (self.fecha_inicio <= hoy <= self.fecha_fin):
@@ -85,8 +117,7 @@ class Promocion(models.Model):
             return False
         
         # Verificar día de la semana (1=Lunes, 7=Domingo)
-        dia_semana = str(hoy.isoweekday())
-        if dia_semana not in self.dias_validos:
+        if not self.dias_validos & dia_bit(dia_semana):
             return False
         
         # Verificar horario si está definido
@@ -111,9 +142,9 @@ class Promocion(models.Model):
         return 0
     
     def incrementar_vistas(self):
-        """Incrementa el contador de vistas"""
+        """Incrementa el contador de vistas (escritura diferida, ver appdely.counters)"""
+        counters.increment(type(self), self.pk, 'vistas')
         self.vistas += 1
-        self.save(update_fields=['vistas'])
     
     def incrementar_uso(self):
         """Incrementa el contador de usos"""
@@ -124,6 +155,12 @@ class Promocion(models.Model):
         verbose_name = "Promoción"
         verbose_name_plural = "Promociones"
         ordering = ['-creada_en']
+        indexes = [
+            # Vigencia por fechas de las promociones activas (ver activas_ahora)
+            models.Index(fields=['fecha_fin', 'fecha_inicio'], condition=Q(activa=True), name='promo_vigentes_idx'),
+            # Paginación por cursor del listado (-creada_en, -id); el índice se recorre al revés
+            models.Index(fields=['creada_en', 'id'], name='promo_cursor_idx'),
+        ]
 
 
 class NoticiaRestaurante(models.Model):
@@ -172,9 +209,9 @@ class NoticiaRestaurante(models.Model):
         return self.titulo
     
     def incrementar_vistas(self):
-        """Incrementa el contador de vistas"""
+        """Incrementa el contador de vistas (escritura diferida, ver appdely.counters)"""
+        counters.increment(type(self), self.pk, 'vistas')
         self.vistas += 1
-        self.save(update_fields=['vistas'])
     
     def obtener_galeria(self):
         """Devuelve lista de URLs de la galería"""
@@ -186,6 +223,10 @@ class NoticiaRestaurante(models.Model):
         verbose_name = "Noticia de Restaurante"
         verbose_name_plural = "Noticias de Restaurantes"
         ordering = ['-fecha_publicacion']
+        indexes = [
+            # Paginación por cursor del listado (-fecha_publicacion, -id); el índice se recorre al revés
+            models.Index(fields=['fecha_publicacion', 'id'], name='noticia_cursor_idx'),
+        ]
 
 
 class UsuarioPromocion(models.Model):
@@ -227,3 +268,40 @@ class BusinessRegistration(models.Model):
     def __str__(self):
         return f"{self.business_name} ({self.contact_email})"
      
+
+
+class OutboundEmail(models.Model):
+    """Correo pendiente de envío (bandeja de salida); lo envía el comando send_outbound_emails."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pendiente'),
+        (SENT, 'Enviado'),
+        (FAILED, 'Fallido'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.TextField(help_text="Destinatarios separados por comas")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to} ({self.status})"
+
+    @property
+    def recipients(self):
+        return [address.strip() for address in self.to.split(',') if address.strip()]
+
+    class Meta:
+        verbose_name = "Correo saliente"
+        verbose_name_plural = "Correos salientes"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
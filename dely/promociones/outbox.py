@@ -0,0 +1,141 @@
+"""Bandeja de salida de correo.
+
+Las vistas no hablan con el servidor SMTP: enqueue() guarda el mensaje en
+OutboundEmail y el comando send_outbound_emails los envía por lotes, abriendo
+una sola conexión por lote. Si un envío falla se reintenta más tarde con espera
+exponencial (BACKOFF_SECONDS * 2^(intentos-1)) hasta MAX_ATTEMPTS, y entonces
+queda como fallido.
+
+Configuración (settings.DELY_OUTBOX):
+    BATCH_SIZE       mensajes por lote / conexión (por defecto 50)
+    MAX_ATTEMPTS     intentos antes de marcarlo como fallido (por defecto 5)
+    BACKOFF_SECONDS  espera tras el primer fallo (por defecto 60)
+    LEASE_SECONDS    tiempo que un lote queda reservado para un despachador (por defecto 300)
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_SECONDS': 60,
+    'LEASE_SECONDS': 300,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'DELY_OUTBOX', {})}
+
+
+def enqueue(subject, body, to, from_email=None):
+    """Encola un correo para el despachador; to es una dirección o una lista."""
+    if isinstance(to, str):
+        to = [to]
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or getattr(settings, 'DEFAULT_FROM_EMAIL', '') or '',
+        to=', '.join(to),
+    )
+
+
+def backoff(attempts, config=None):
+    """Espera antes del siguiente intento tras attempts fallos."""
+    config = config or get_config()
+    return timedelta(seconds=config['BACKOFF_SECONDS'] * 2 ** (attempts - 1))
+
+
+def claim_batch(config=None):
+    """Reserva un lote de mensajes pendientes cuyo turno ya llegó.
+
+    La reserva adelanta next_attempt_at LEASE_SECONDS, de modo que otro despachador
+    no los tome mientras tanto; si este proceso muere, vuelven a estar disponibles.
+    """
+    config = config or get_config()
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:config['BATCH_SIZE']]
+        )
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+            next_attempt_at=now + timedelta(seconds=config['LEASE_SECONDS'])
+        )
+    return batch
+
+
+def send_batch(batch, config=None, connection=None):
+    """Envía el lote por una única conexión; devuelve (enviados, fallidos)."""
+    config = config or get_config()
+    if not batch:
+        return 0, 0
+    connection = connection or get_connection()
+    sent = failed = 0
+    try:
+        connection.open()
+    except Exception as exc:
+        # Sin conexión no se puede enviar nada del lote: todos cuentan un intento fallido
+        for email in batch:
+            _record_failure(email, exc, config)
+        return 0, len(batch)
+    try:
+        for email in batch:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email or None, email.recipients, connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as exc:
+                _record_failure(email, exc, config)
+                failed += 1
+            else:
+                email.status = OutboundEmail.SENT
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                email.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+                sent += 1
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            logger.exception("Error cerrando la conexión de correo")
+    return sent, failed
+
+
+def _record_failure(email, exc, config):
+    email.attempts += 1
+    email.last_error = f"{type(exc).__name__}: {exc}"
+    if email.attempts >= config['MAX_ATTEMPTS']:
+        email.status = OutboundEmail.FAILED
+    else:
+        email.next_attempt_at = timezone.now() + backoff(email.attempts, config)
+    email.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
+    logger.warning("Fallo enviando correo %s (intento %s): %s", email.pk, email.attempts, email.last_error)
+
+
+def dispatch(max_batches=None, connection=None):
+    """Envía lotes hasta vaciar la cola de mensajes vencidos; devuelve (enviados, fallidos)."""
+    config = get_config()
+    total_sent = total_failed = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        batch = claim_batch(config)
+        if not batch:
+            break
+        sent, failed = send_batch(batch, config, connection)
+        total_sent += sent
+        total_failed += failed
+        batches += 1
+    return total_sent, total_failed
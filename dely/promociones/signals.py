@@ -0,0 +1,15 @@
+from appdely import cache, search
+
+from .models import NoticiaRestaurante, Promocion, TipoPromocion
+
+
+# Índice de búsqueda: se actualiza en cada guardado/borrado
+search.register(Promocion, 'promocion', search.promocion_document,
+                fields=['titulo', 'descripcion_corta', 'descripcion', 'activa'])
+search.register(NoticiaRestaurante, 'noticia', search.noticia_document,
+                fields=['titulo', 'subtitulo', 'resumen', 'contenido', 'activa'])
+
+# Caché de páginas de promociones y noticias
+cache.invalidate_on(Promocion, 'promocion')
+cache.invalidate_on(TipoPromocion, 'promocion')
+cache.invalidate_on(NoticiaRestaurante, 'noticia')
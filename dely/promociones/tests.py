@@ -0,0 +1,109 @@
+"""Bandeja de salida de correo con los backends locmem y de archivos."""
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from promociones import outbox
+from promociones.models import OutboundEmail
+
+
+class FailingBackend(BaseEmailBackend):
+    """Backend que rechaza todos los envíos."""
+
+    def send_messages(self, email_messages):
+        raise ConnectionError("servidor caído")
+
+
+class UnreachableBackend(BaseEmailBackend):
+    """Backend que no puede abrir la conexión."""
+
+    def open(self):
+        raise ConnectionRefusedError("conexión rechazada")
+
+    def send_messages(self, email_messages):
+        return len(email_messages)
+
+
+def send_outbound_emails():
+    out = StringIO()
+    call_command('send_outbound_emails', stdout=out)
+    return out.getvalue()
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    DELY_OUTBOX={'BATCH_SIZE': 2, 'MAX_ATTEMPTS': 3, 'BACKOFF_SECONDS': 60},
+)
+class OutboxTests(TestCase):
+    def test_enqueue_does_not_send(self):
+        outbox.enqueue('Hola', 'Cuerpo', 'a@dely.co')
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.PENDING)
+
+    def test_sender_delivers_all_batches(self):
+        for i in range(5):
+            outbox.enqueue(f'Asunto {i}', 'Cuerpo', [f'a{i}@dely.co', f'b{i}@dely.co'])
+        self.assertIn('Enviados: 5, con error: 0', send_outbound_emails())
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].to, ['a0@dely.co', 'b0@dely.co'])
+        self.assertFalse(OutboundEmail.objects.exclude(status=OutboundEmail.SENT).exists())
+        self.assertFalse(OutboundEmail.objects.filter(sent_at__isnull=True).exists())
+        # Lo ya enviado no se vuelve a enviar
+        self.assertIn('Enviados: 0, con error: 0', send_outbound_emails())
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_failures_back_off_then_give_up(self):
+        email = outbox.enqueue('Hola', 'Cuerpo', 'a@dely.co')
+        with override_settings(EMAIL_BACKEND='promociones.tests.FailingBackend'), \
+                self.assertLogs('promociones.outbox', 'WARNING') as logs:
+            self.assertIn('con error: 1', send_outbound_emails())
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), (OutboundEmail.PENDING, 1))
+            self.assertIn('servidor caído', email.last_error)
+            self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+            # Aún no le toca: no se reintenta
+            self.assertIn('con error: 0', send_outbound_emails())
+            for attempts in (2, 3):
+                OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+                send_outbound_emails()
+                email.refresh_from_db()
+                self.assertEqual(email.attempts, attempts)
+            # Segundo fallo: espera doble
+            self.assertEqual(outbox.backoff(2), timedelta(seconds=120))
+        self.assertEqual(email.status, OutboundEmail.FAILED)
+        self.assertEqual(len(logs.output), 3)
+
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        send_outbound_emails()
+        self.assertEqual(mail.outbox, [])
+
+    def test_retry_succeeds_after_failure(self):
+        email = outbox.enqueue('Hola', 'Cuerpo', 'a@dely.co')
+        with override_settings(EMAIL_BACKEND='promociones.tests.UnreachableBackend'), \
+                self.assertLogs('promociones.outbox', 'WARNING'):
+            self.assertIn('con error: 1', send_outbound_emails())
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        send_outbound_emails()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.last_error), (OutboundEmail.SENT, 2, ''))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_file_backend(self):
+        with tempfile.TemporaryDirectory() as path:
+            with override_settings(EMAIL_BACKEND='django.core.mail.backends.filebased.EmailBackend',
+                                   EMAIL_FILE_PATH=path):
+                for i in range(3):
+                    outbox.enqueue(f'Asunto {i}', 'Cuerpo', 'a@dely.co')
+                send_outbound_emails()
+            written = ''.join(p.read_text() for p in Path(path).iterdir())
+        # Un archivo por conexión (lote) con todos sus mensajes
+        self.assertEqual(written.count('Subject: Asunto'), 3)
+        self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.SENT).count(), 3)
@@ -1,23 +1,25 @@
 from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator
+from appdely import search
+from appdely.cache import cache_view
+from appdely.pagination import KeysetPaginator
 from django.db.models import Q
 from django.utils import timezone
 from .models import Promocion, NoticiaRestaurante, TipoPromocion
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect
-from appdely.models import Point
+from appdely.models import InsufficientPoints, Point, PointBalance
 from django.contrib import messages
-from django.db import models
 from django.templatetags.static import static
 from django.conf import settings
-from django.core.mail import send_mail, EmailMessage
+from . import outbox
 from .forms import SubscriptionForm, BusinessRegistrationForm
 
 
+@cache_view('promocion', 'business')
 def promociones_list(request):
     """Lista todas las promociones activas"""
-    # Filtrar solo promociones activas
-    promociones = Promocion.objects.filter(activa=True).select_related('restaurante', 'tipo_promocion')
+    # Filtrar solo promociones activas en este momento (fechas, días, horario y límite de usos)
+    promociones = Promocion.objects.activas_ahora().select_related('restaurante', 'tipo_promocion')
     
     # Filtro por tipo de promoción
     tipo_filtro = request.GET.get('tipo')
@@ -29,13 +31,9 @@ def promociones_list(request):
     if restaurante_filtro:
         promociones = promociones.filter(restaurante__business_name__icontains=restaurante_filtro)
     
-    # Ordenar por fecha de creación
-    promociones = promociones.order_by('-creada_en')
-    
-    # Paginación
-    paginator = Paginator(promociones, 12)  # 12 promociones por página
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginación por cursor, ordenando por fecha de creación (id desempata)
+    paginator = KeysetPaginator(promociones, ['-creada_en', '-id'], 12)  # 12 promociones por página
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     # Obtener tipos de promoción para el filtro
     tipos_promocion = TipoPromocion.objects.all()
@@ -58,9 +56,8 @@ def promocion_detail(request, pk):
     promocion.incrementar_vistas()
     
     # Obtener promociones relacionadas del mismo restaurante
-    promociones_relacionadas = Promocion.objects.filter(
-        restaurante=promocion.restaurante,
-        activa=True
+    promociones_relacionadas = Promocion.objects.activas_ahora().filter(
+        restaurante=promocion.restaurante
     ).exclude(pk=pk)[:3]
     
     context = {
@@ -74,6 +71,7 @@ def promocion_detail(request, pk):
     return render(request, 'promociones/promocion_detail.html', context)
 
 
+@cache_view('noticia', 'business')
 def noticias_list(request):
     """Lista todas las noticias de restaurantes"""
     noticias = NoticiaRestaurante.objects.filter(activa=True).select_related('restaurante', 'autor')
@@ -91,19 +89,20 @@ def noticias_list(request):
     # Búsqueda por título
     busqueda = request.GET.get('q')
     if busqueda:
-        noticias = noticias.filter(
-            Q(titulo__icontains=busqueda) | 
-            Q(contenido__icontains=busqueda) |
-            Q(resumen__icontains=busqueda)
-        )
+        resultados = search.search('noticia', busqueda)
+        if resultados is None:
+            # Motor sin índice de texto completo
+            noticias = noticias.filter(
+                Q(titulo__icontains=busqueda) | 
+                Q(contenido__icontains=busqueda) |
+                Q(resumen__icontains=busqueda)
+            )
+        else:
+            noticias = noticias.filter(id__in=[noticia_id for noticia_id, _ in resultados])
     
-    # Ordenar por fecha de publicación
-    noticias = noticias.order_by('-fecha_publicacion')
-    
-    # Paginación
-    paginator = Paginator(noticias, 10)  # 10 noticias por página
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginación por cursor, ordenando por fecha de publicación (id desempata)
+    paginator = KeysetPaginator(noticias, ['-fecha_publicacion', '-id'], 10)  # 10 noticias por página
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     # Noticias destacadas para el banner
     noticias_destacadas = NoticiaRestaurante.objects.filter(
@@ -142,9 +141,8 @@ def noticia_detail(request, pk):
     # Si la noticia está asociada a un restaurante, obtener sus promociones
     promociones_restaurante = []
     if noticia.restaurante:
-        promociones_restaurante = Promocion.objects.filter(
-            restaurante=noticia.restaurante,
-            activa=True
+        promociones_restaurante = Promocion.objects.activas_ahora().filter(
+            restaurante=noticia.restaurante
         )[:3]
     
     context = {
@@ -157,12 +155,11 @@ def noticia_detail(request, pk):
     return render(request, 'promociones/noticia_detail.html', context)
 
 
+@cache_view('promocion', 'noticia', 'business')
 def promociones_noticias(request):
     """Vista combinada: promociones destacadas + noticias recientes"""
     # Promociones destacadas (las más vistas o recientes)
-    promociones_destacadas = Promocion.objects.filter(
-        activa=True
-    ).order_by('-vistas', '-creada_en')[:6]
+    promociones_destacadas = Promocion.objects.activas_ahora().order_by('-vistas', '-creada_en')[:6]
     
     # Noticias recientes
     noticias_recientes = NoticiaRestaurante.objects.filter(
@@ -171,14 +168,12 @@ def promociones_noticias(request):
     
     # Promociones que terminan pronto (urgentes)
     hoy = timezone.now().date()
-    promociones_urgentes = Promocion.objects.filter(
-        activa=True,
-        fecha_fin__gte=hoy,
+    promociones_urgentes = Promocion.objects.activas_ahora().filter(
         fecha_fin__lte=hoy + timezone.timedelta(days=3)
     ).order_by('fecha_fin')[:4]
     
     # Estadísticas generales
-    total_promociones_activas = Promocion.objects.filter(activa=True).count()
+    total_promociones_activas = Promocion.objects.activas_ahora().count()
     total_noticias = NoticiaRestaurante.objects.filter(activa=True).count()
     
     context = {
@@ -203,24 +198,17 @@ def subscribe(request):
             from .models import Subscriber
             subscriber_obj, created = Subscriber.objects.get_or_create(email=email)
 
-            # Enviar correo a Dely informando nuevo suscriptor (y opcional confirmación al usuario)
+            # Avisar a Dely del nuevo suscriptor y confirmar al usuario; los correos
+            # se encolan y los envía send_outbound_emails, sin esperar al servidor SMTP
             subject = 'Nuevo suscriptor - Dely'
             body = f'Nueva suscripción: {email}\nFuente: promociones_noticias'
             recipient = getattr(settings, 'DELY_CONTACT_EMAIL', None)
             if recipient:
-                try:
-                    send_mail(subject, body, getattr(settings, 'DEFAULT_FROM_EMAIL', None), [recipient])
-                except Exception:
-                    # no bloquear la UX si falla el envío
-                    pass
-
-            # enviar correo de confirmación al suscriptor si se desea
-            try:
-                confirmation_subject = 'Gracias por suscribirte a Dely'
-                confirmation_body = 'Gracias por suscribirte. Te enviaremos novedades y promociones.'
-                send_mail(confirmation_subject, confirmation_body, getattr(settings, 'DEFAULT_FROM_EMAIL', None), [email])
-            except Exception:
-                pass
+                outbox.enqueue(subject, body, recipient)
+
+            confirmation_subject = 'Gracias por suscribirte a Dely'
+            confirmation_body = 'Gracias por suscribirte. Te enviaremos novedades y promociones.'
+            outbox.enqueue(confirmation_subject, confirmation_body, email)
 
             messages.success(request, 'Gracias por suscribirte. Revisa tu correo para confirmar.')
             return redirect('promociones_noticias')
@@ -250,10 +238,7 @@ def register_business(request):
 
             recipient = getattr(settings, 'DELY_CONTACT_EMAIL', None)
             if recipient:
-                try:
-                    send_mail(subject, body, getattr(settings, 'DEFAULT_FROM_EMAIL', None), [recipient])
-                except Exception:
-                    pass
+                outbox.enqueue(subject, body, recipient)
 
             messages.success(request, 'Gracias. Tu registro ha sido enviado. Nos pondremos en contacto.')
             return redirect('promociones_noticias')
@@ -272,8 +257,8 @@ def descuentos_list(request):
         {'id': 3, 'title': 'Envío gratis - Código C', 'cost': 15},
     ]
 
-    # Calcular puntos acumulados del usuario
-    puntos = Point.objects.filter(user=request.user).aggregate(total=models.Sum('amount'))['total'] or 0
+    # Puntos acumulados del usuario (saldo materializado)
+    puntos = PointBalance.for_user(request.user).total
 
     return render(request, 'promociones/descuentos_list.html', {'opciones': opciones, 'puntos': puntos})
 
@@ -287,8 +272,6 @@ def descuento_qr(request, opcion_id):
         messages.error(request, 'Opción inválida.')
         return redirect('promociones_list')
 
-    # Verificar puntos
-    puntos = Point.objects.filter(user=request.user).aggregate(total=models.Sum('amount'))['total'] or 0
     # Buscar la opción y su coste
     opciones_map = {o['id']: o for o in [
         {'id': 1, 'title': '5% OFF - Código A', 'cost': 5},
@@ -301,19 +284,18 @@ def descuento_qr(request, opcion_id):
         messages.error(request, 'Opción de descuento no encontrada.')
         return redirect('descuentos_list')
 
+    # Comprobar saldo y registrar el movimiento de -cost puntos en una sola operación atómica
     cost = opcion['cost']
-    if puntos < cost:
+    try:
+        PointBalance.redeem(
+            request.user,
+            cost,
+            description=f'Redención descuento opción {opcion_id} ({opcion["title"]})',
+        )
+    except InsufficientPoints:
         messages.error(request, 'No tienes suficientes puntos para redimir este descuento.')
         return redirect('descuentos_list')
 
-    # Registrar movimiento de -cost puntos
-    Point.objects.create(
-        user=request.user,
-        amount=-cost,
-        description=f'Redención descuento opción {opcion_id} ({opcion["title"]})',
-        movement_type='redeem'
-    )
-
     # Mostrar plantilla con el QR (el QR debe colocarse en static/promociones/img/qr.png o ruta similar)
     # Construimos la URL estática con la utilidad de Django para evitar problemas de ruta
     qr_url = static('promociones/img/qr.png')